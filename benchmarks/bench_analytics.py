@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark for delphi_analytics over large parameter sweeps.
+
+Writes a synthetic sweep of composite JSON files (random ratings and
+confidence, short texts) to a temporary directory, then times loading them
+into a dense array and computing every statistic.
+
+Usage: python benchmarks/bench_analytics.py [--runs N] [--rounds N] [--characters N]
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import delphi_analytics as analytics  # noqa: E402
+
+
+def write_sweep(directory: Path, runs: int, rounds: int, characters: int,
+                questions: int = 6, seed: int = 0) -> list:
+    """Write runs x rounds composite files; return per-run lists of paths."""
+    rng = np.random.default_rng(seed)
+    ratings = rng.integers(1, 8, size=(runs, rounds, characters, questions))
+    confidence = rng.integers(1, 6, size=(runs, rounds, characters, questions))
+    sweep = []
+    for run in range(runs):
+        paths = []
+        for rnd in range(rounds):
+            composite = {
+                f"character-{c}": {"responses": [
+                    {"question": q + 1,
+                     "rating": int(ratings[run, rnd, c, q]),
+                     "position_summary": "Summary.",
+                     "detailed_explanation": "Explanation.",
+                     "confidence": int(confidence[run, rnd, c, q])}
+                    for q in range(questions)
+                ]}
+                for c in range(characters)
+            }
+            path = directory / f"run{run}_round{rnd + 1}.json"
+            path.write_text(json.dumps(composite), encoding="utf-8")
+            paths.append(path)
+        sweep.append(paths)
+    return sweep
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--characters", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sweep = write_sweep(Path(tmp), args.runs, args.rounds, args.characters)
+
+        start = time.perf_counter()
+        panel = analytics.load_runs(sweep)
+        loaded = time.perf_counter()
+        analytics.question_medians(panel.ratings)
+        analytics.question_iqr(panel.ratings)
+        analytics.confidence_weighted_means(panel.ratings, panel.confidence)
+        analytics.kendalls_w(panel.ratings)
+        analytics.convergence(panel.ratings)
+        computed = time.perf_counter()
+
+    print(f"array shape {panel.ratings.shape}")
+    print(f"load    {loaded - start:8.3f} s  ({args.runs * args.rounds} files)")
+    print(f"compute {computed - loaded:8.3f} s  (medians, IQR, weighted means, Kendall's W, convergence)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for JSON extraction from raw model responses.
+
+Compares the previous approach (greedy regex, hjson tried before json) with
+the single-pass extractor in delphi.py. Inputs are the raw responses saved under
+debug_output/; if there are none, responses are synthesised from the composite
+round one JSON, wrapped in the kinds of chatter models add around their output.
+
+Usage: python benchmarks/bench_extract_json.py [--repeat N]
+"""
+import argparse
+import gzip
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+import hjson
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import delphi  # noqa: E402
+
+
+def legacy_extract_blocks(text: str) -> List[str]:
+    """The original regex-based block extraction."""
+    code_blocks = re.findall(r'```(?:json)?(.*?)```', text, re.DOTALL)
+    if code_blocks:
+        return code_blocks
+    json_blocks = re.findall(r'(\{.*"responses".*\})', text, re.DOTALL)
+    if json_blocks:
+        return json_blocks
+    return [text]
+
+
+LEGACY_PARSERS = [("hjson", hjson.loads), ("standard_json", json.loads)]
+
+
+def parse(text: str, extract: Callable[[str], List[str]],
+          parsers: List[Tuple[str, Callable]]) -> Optional[str]:
+    """Return the name of the parser that succeeded, or None."""
+    for block in extract(text):
+        for name, parser in parsers:
+            try:
+                if "responses" in parser(block):
+                    return name
+            except Exception:
+                pass
+    return None
+
+
+def load_samples() -> List[str]:
+    """Raw responses from debug_output/, or synthesised ones."""
+    samples = []
+    for path in sorted((ROOT / "debug_output").rglob("*raw_response*")):
+        opener = gzip.open if path.suffix == ".gz" else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            samples.append(f.read())
+    if samples:
+        return samples
+
+    composite = json.loads((ROOT / "delphi_round1" / "round1_responses.json").read_text(encoding="utf-8"))
+    for data in composite.values():
+        body = json.dumps(data, indent=2)
+        samples.append(body)
+        samples.append(f"```json\n{body}\n```")
+        samples.append(f"Here's what I think, y'know:\n\n{body}\n\nHope that's {{useful}}!")
+    return samples
+
+
+def bench(name: str, samples: List[str], extract, parsers, repeat: int) -> None:
+    """Time parsing every sample `repeat` times and print a summary line."""
+    paths = [parse(s, extract, parsers) for s in samples]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for sample in samples:
+            parse(sample, extract, parsers)
+    elapsed = time.perf_counter() - start
+    per_response = elapsed / (repeat * len(samples)) * 1e6
+    counts = {p: paths.count(p) for p in sorted(set(paths), key=str)}
+    print(f"{name:<8} {per_response:10.1f} us/response   parser used: {counts}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    samples = load_samples()
+    total_kb = sum(len(s) for s in samples) / 1024
+    print(f"{len(samples)} responses, {total_kb:.1f} KB total, {args.repeat} repeats")
+    bench("legacy", samples, legacy_extract_blocks, LEGACY_PARSERS, args.repeat)
+    bench("current", samples, delphi.extract_json_blocks, delphi.JSON_PARSERS, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
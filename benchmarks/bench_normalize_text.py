@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for normalize_text on large responses.
+
+Compares the previous implementation (sequential str.replace passes, a full
+NFKD pass and a per-character generator) with the translate-table version in
+delphi.py on multi-hundred-KB inputs: plain ASCII (already normalized), typical
+model output with smart punctuation, and accent-heavy text.
+
+Usage: python benchmarks/bench_normalize_text.py [--size-kb N] [--repeat N]
+"""
+import argparse
+import json
+import sys
+import time
+import unicodedata
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import delphi  # noqa: E402
+
+
+def legacy_normalize_text(text: str) -> str:
+    """The original normalize_text implementation."""
+    for char, replacement in delphi.UNICODE_REPLACEMENTS.items():
+        text = text.replace(char, replacement)
+    normalized = unicodedata.normalize('NFKD', text)
+    return ''.join(
+        char if ord(char) < 128 else
+        unicodedata.normalize('NFKD', char).encode('ascii', 'ignore').decode('ascii') or ' '
+        for char in normalized
+    )
+
+
+def make_inputs(size: int) -> dict:
+    """Build inputs of roughly `size` characters each."""
+    composite = json.loads((ROOT / "delphi_round1" / "round1_responses.json").read_text(encoding="utf-8"))
+    base = json.dumps(composite, indent=2)
+    smart = (base.replace("'", "’").replace(" - ", " — ")
+             .replace("...", "…").replace(". ", ". "))
+    accented = base.replace("e", "é").replace("a", "à").replace("o", "ö")
+
+    def scale(text: str) -> str:
+        return (text * (size // len(text) + 1))[:size]
+
+    return {"ascii": scale(base), "smart punctuation": scale(smart), "accented": scale(accented)}
+
+
+def throughput(func, text: str, repeat: int) -> float:
+    """Return MB/s for func over text."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(text)
+    elapsed = time.perf_counter() - start
+    return len(text) * repeat / elapsed / 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size-kb", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for name, text in make_inputs(args.size_kb * 1024).items():
+        assert legacy_normalize_text(text) == delphi.normalize_text(text), name
+        legacy = throughput(legacy_normalize_text, text, args.repeat)
+        current = throughput(delphi.normalize_text, text, args.repeat)
+        print(f"{name:<18} legacy {legacy:9.1f} MB/s   current {current:9.1f} MB/s   "
+              f"({current / legacy:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
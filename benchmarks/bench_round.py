@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+End-to-end round benchmark against a local fake LLM server.
+
+Starts benchmarks/fake_llm_server.py in-process, points a DelphiConfig at it
+and runs complete rounds, reporting throughput, per-character latency
+percentiles and the parse-failure rate. Results are written as JSON (by
+default to benchmarks/results/) so runs from different versions can be compared.
+
+Usage: python benchmarks/bench_round.py [--latency 1.0] [--jitter 0.2]
+           [--error-rate 0.0] [--stream] [--concurrency 4] [--iterations 3]
+           [--backends 1] [--prefill-per-token 0.0] [--prompt-layout shared-prefix]
+           [--constrained] [--slow-rate 0.05] [--slow-latency 10] [--hedge-percentile 95]
+           [--character-deadline 0]
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import delphi  # noqa: E402
+from fake_llm_server import FakeLLMServer, FakeServerSettings  # noqa: E402
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """p50/p95/p99 of values (all equal to the single value if there is one)."""
+    if not values:
+        return {}
+    if len(values) == 1:
+        return {"p50": values[0], "p95": values[0], "p99": values[0]}
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98]}
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    settings = FakeServerSettings(latency=args.latency, jitter=args.jitter,
+                                  error_rate=args.error_rate, retry_after=args.retry_after,
+                                  prefill_per_token=args.prefill_per_token, slow_rate=args.slow_rate,
+                                  slow_latency=args.slow_latency, seed=args.seed)
+    servers = [FakeLLMServer(0, settings).start() for _ in range(args.backends)]
+
+    # Time every character end to end, including retries and parsing
+    latencies: List[float] = []
+    generate = delphi.generate_character_response
+
+    def timed_generate(*a: Any, **kw: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return generate(*a, **kw)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    delphi.generate_character_response = timed_generate
+    os.chdir(ROOT)  # Profiles and questionnaire are resolved relative to the repo
+
+    walls = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        config = delphi.DelphiConfig(
+            api_endpoints=[f"127.0.0.1:{server.port}" for server in servers],
+            stream=args.stream,
+            prompt_layout=args.prompt_layout,
+            constrained=args.constrained,
+            hedge_percentile=args.hedge_percentile,
+            character_deadline=args.character_deadline,
+            max_concurrency=args.concurrency,
+            rate_limit=args.rate_limit,
+            use_cache=False,
+            debug_level="off",
+            output_dir=tmp_path / "delphi_round1",
+            debug_dir=tmp_path / "debug_output",
+            log_file=tmp_path / "logs" / "delphi_process.log",
+            cache_dir=tmp_path / "cache",
+            results_db=tmp_path / "results.sqlite",
+        )
+        try:
+            for _ in range(args.iterations):
+                start = time.perf_counter()
+                delphi.run_delphi_round_one(config)
+                walls.append(time.perf_counter() - start)
+        finally:
+            config.debug_writer.close()
+            config.client.close()
+            config.store.close()
+            for server in servers:
+                server.stop()
+            delphi.generate_character_response = generate
+
+    characters = len(config.characters) * args.iterations
+    return {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "settings": vars(args),
+        "characters": characters,
+        "round_wall_seconds": walls,
+        "throughput_characters_per_second": characters / sum(walls),
+        "character_latency_seconds": percentiles(latencies),
+        "parse_failure_rate": config.stats["parse_fallbacks"] / max(1, len(latencies)),
+        "strict_parse_rate": config.stats["parsed_strict"] / max(1, len(latencies)),
+        "budget_tokens": config.stats["budget_tokens"],
+        "completion_tokens": config.stats["completion_tokens"],
+        "continuations": config.stats["continuations"],
+        "hedged_requests": config.stats["hedged_requests"],
+        "hedges_won": config.stats["hedges_won"],
+        "deadlines_exceeded": config.stats["deadlines_exceeded"],
+        "prompt_tokens": config.stats["prompt_tokens"],
+        "prompt_eval_tokens": config.stats["prompt_eval_tokens"],
+        "prompt_eval_seconds": config.stats["prompt_eval_ms"] / 1000,
+        "server": {
+            "requests": sum(server.stats.requests for server in servers),
+            "errors": sum(server.stats.errors for server in servers),
+            "streamed": sum(server.stats.streamed for server in servers),
+            "requests_per_backend": [server.stats.requests for server in servers],
+            "latency_seconds": percentiles([t for server in servers for t in server.stats.latencies]),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--latency", type=float, default=1.0, help="Mean server latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Uniform latency jitter (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of 503 responses")
+    parser.add_argument("--retry-after", type=float, default=None, help="Retry-After on 503s (s)")
+    parser.add_argument("--stream", action="store_true", help="Use SSE streaming")
+    parser.add_argument("--constrained", action="store_true", help="Send a JSON schema with each request")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Fraction of slow outlier requests")
+    parser.add_argument("--slow-latency", type=float, default=10.0, help="Extra latency of slow outliers (s)")
+    parser.add_argument("--hedge-percentile", type=float, default=0.0,
+                        help="Duplicate requests slower than this latency percentile (0 disables)")
+    parser.add_argument("--character-deadline", type=float, default=0.0,
+                        help="Seconds allowed per character (0 disables)")
+    parser.add_argument("--concurrency", type=int, default=4, help="In-flight requests per backend")
+    parser.add_argument("--backends", type=int, default=1, help="Fake servers to balance across")
+    parser.add_argument("--prefill-per-token", type=float, default=0.0,
+                        help="Simulated prefill cost per uncached prompt token (s)")
+    parser.add_argument("--prompt-layout", choices=delphi.PROMPT_LAYOUTS, default="profile-first")
+    parser.add_argument("--rate-limit", type=float, default=0.0,
+                        help="Client requests per second (0 disables the limiter's token bucket)")
+    parser.add_argument("--iterations", type=int, default=3, help="Rounds to run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=None, help="Where to write the JSON results")
+    args = parser.parse_args()
+    output = args.output or ROOT / "benchmarks" / "results" / f"round-{time.strftime('%Y%m%d-%H%M%S')}.json"
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s: %(message)s")
+    results = run_benchmark(args)
+    results["settings"]["output"] = str(output)
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    latency = results["character_latency_seconds"]
+    print(f"{results['characters']} characters in {sum(results['round_wall_seconds']):.2f} s "
+          f"({results['throughput_characters_per_second']:.2f} characters/s)")
+    print(f"character latency p50 {latency['p50']:.3f} s  p95 {latency['p95']:.3f} s  "
+          f"p99 {latency['p99']:.3f} s")
+    print(f"parse failure rate {results['parse_failure_rate']:.1%}, "
+          f"strict parse rate {results['strict_parse_rate']:.1%}, "
+          f"server requests {results['server']['requests']} (errors {results['server']['errors']})")
+    print(f"completion tokens {results['completion_tokens']} of {results['budget_tokens']} reserved, "
+          f"{results['continuations']} continuations")
+    print(f"prompt eval {results['prompt_eval_tokens']} of {results['prompt_tokens']} tokens "
+          f"in {results['prompt_eval_seconds']:.2f} s")
+    if results["hedged_requests"] or results["deadlines_exceeded"]:
+        print(f"hedged requests {results['hedged_requests']} ({results['hedges_won']} won by the duplicate), "
+              f"deadlines exceeded {results['deadlines_exceeded']}")
+    if args.backends > 1:
+        print(f"requests per backend {results['server']['requests_per_backend']}")
+    print(f"results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Vector index benchmark over synthetic chunks.
+
+Fills a temporary delphi_vectors.VectorIndex with random unit vectors
+labelled like a large panel (characters x questions x rounds), then reports
+insertion throughput and query latency percentiles for exact search
+(unfiltered and filtered by question or character) and IVF search, with the
+IVF recall@k measured against exact search.
+
+Usage: python benchmarks/bench_vectors.py [--chunks 300000] [--dim 256] [--queries 200]
+"""
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from delphi_vectors import HashingEmbedder, VectorIndex  # noqa: E402
+
+
+def latency_ms(search: Callable[[np.ndarray], Any], queries: np.ndarray) -> Dict[str, float]:
+    """p50/p95/p99 milliseconds of search over the queries."""
+    times = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query)
+        times.append((time.perf_counter() - start) * 1000)
+    cuts = statistics.quantiles(times, n=100, method="inclusive")
+    return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98]}
+
+
+def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    rng = np.random.default_rng(args.seed)
+    # Clustered data, like answers that paraphrase a few positions
+    centers = rng.standard_normal((args.topics, args.dim)).astype(np.float32)
+    results: Dict[str, Any] = {"settings": vars(args)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = VectorIndex(Path(tmp), HashingEmbedder(args.dim))
+        start = time.perf_counter()
+        for offset in range(0, args.chunks, args.batch):
+            n = min(args.batch, args.chunks - offset)
+            ids = np.arange(offset, offset + n)
+            vectors = centers[rng.integers(args.topics, size=n)] + 0.5 * rng.standard_normal((n, args.dim))
+            chunks = [{"character": f"persona-{i // 12 % args.characters}", "question": int(i % 6) + 1,
+                       "round": 1, "run_id": "bench", "field": "detailed_explanation",
+                       "text": f"chunk {i}"} for i in ids]
+            index.add_vectors(vectors, chunks)
+        results["insert_chunks_per_second"] = args.chunks / (time.perf_counter() - start)
+
+        queries = centers[rng.integers(args.topics, size=args.queries)] \
+            + 0.5 * rng.standard_normal((args.queries, args.dim))
+        k = args.k
+        results["exact_ms"] = latency_ms(lambda q: index.search(q, k), queries)
+        results["exact_question_ms"] = latency_ms(lambda q: index.search(q, k, question=3), queries)
+        results["exact_character_ms"] = latency_ms(lambda q: index.search(q, k, character="persona-7"), queries)
+        exact = [{hit["text"] for hit in index.search(q, k)} for q in queries]
+
+        start = time.perf_counter()
+        index.build_ivf()
+        results["ivf_build_seconds"] = time.perf_counter() - start
+        results["ivf_ms"] = latency_ms(lambda q: index.search(q, k, nprobe=args.nprobe), queries)
+        found = [len(exact[i] & {hit["text"] for hit in index.search(q, k, nprobe=args.nprobe)})
+                 for i, q in enumerate(queries)]
+        results["ivf_recall_at_k"] = sum(found) / (k * len(queries))
+
+        # Reopen from disk to measure a cold start from the memory-mapped files
+        start = time.perf_counter()
+        reopened = VectorIndex(Path(tmp), HashingEmbedder(args.dim))
+        reopened.search(queries[0], k)
+        results["reopen_first_query_ms"] = (time.perf_counter() - start) * 1000
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--chunks", type=int, default=300000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--characters", type=int, default=5000)
+    parser.add_argument("--topics", type=int, default=200, help="Clusters the synthetic vectors are drawn around")
+    parser.add_argument("--batch", type=int, default=10000, help="Chunks per insertion")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, default=8, help="IVF clusters scanned per query")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=None, help="Where to write the JSON results")
+    args = parser.parse_args()
+
+    results = run_benchmark(args)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(results, indent=2, default=str), encoding="utf-8")
+
+    print(f"{args.chunks} chunks inserted at {results['insert_chunks_per_second']:.0f} chunks/s")
+    for name in ("exact_ms", "exact_question_ms", "exact_character_ms", "ivf_ms"):
+        latency = results[name]
+        print(f"{name[:-3]:<16} p50 {latency['p50']:.2f} ms  p95 {latency['p95']:.2f} ms  "
+              f"p99 {latency['p99']:.2f} ms")
+    print(f"IVF built in {results['ivf_build_seconds']:.1f} s, recall@{args.k} "
+          f"{results['ivf_recall_at_k']:.1%} at nprobe {args.nprobe}")
+    print(f"reopen and first query {results['reopen_first_query_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the llama.cpp OpenAI-compatible API.
+
+Serves /engines/llama.cpp/v1/chat/completions by replaying recorded
+completions with configurable latency, jitter, slow outliers, error rate and SSE streaming,
+so the pipeline can be exercised and measured without a model server.
+Prompt prefill is simulated per uncached token, with a small llama.cpp-style
+prompt cache that requests opt into with "cache_prompt". Requests with a
+JSON schema response_format get bare JSON, as constrained decoding would.
+Completions longer than max_tokens are cut off with finish_reason "length";
+a follow-up whose assistant message is such a partial reply gets the rest.
+Completions are seeded from the round one composite JSON and any raw
+responses under debug_output/.
+
+Usage: python benchmarks/fake_llm_server.py [--port 12434] [--latency 1.0] ...
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+API_PREFIX = "/engines/llama.cpp/v1"
+
+
+def constrain(completion: str) -> str:
+    """The JSON object inside a recorded completion, without surrounding chatter."""
+    start, end = completion.find("{"), completion.rfind("}")
+    try:
+        return json.dumps(json.loads(completion[start:end + 1]), indent=2)
+    except ValueError:
+        return completion
+
+
+def load_completions(root: Path = ROOT) -> List[str]:
+    """Recorded completions: composite round one entries plus raw debug responses."""
+    completions = []
+    composite = root / "delphi_round1" / "round1_responses.json"
+    if composite.exists():
+        data = json.loads(composite.read_text(encoding="utf-8"))
+        completions.extend(json.dumps({"responses": entry["responses"]}, indent=2)
+                           for entry in data.values())
+    for path in sorted((root / "debug_output").rglob("*raw_response*")):
+        opener = gzip.open if path.suffix == ".gz" else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            completions.append(f.read())
+    return completions
+
+
+@dataclass
+class FakeServerSettings:
+    """Behaviour of the fake server."""
+    latency: float = 1.0  # Mean seconds before the first byte
+    jitter: float = 0.2  # Uniform +/- seconds around the latency
+    error_rate: float = 0.0  # Fraction of requests answered with 503
+    slow_rate: float = 0.0  # Fraction of requests that are slow outliers
+    slow_latency: float = 10.0  # Extra seconds before the first byte of a slow outlier
+    retry_after: Optional[float] = None  # Retry-After header on 503s
+    stream_chunk_chars: int = 16  # Characters per SSE event
+    stream_chunk_delay: float = 0.005  # Seconds between SSE events
+    prefill_per_token: float = 0.0  # Seconds per prompt token not served from the prompt cache
+    prompt_cache_slots: int = 4  # Recent prompts kept for prefix reuse
+    seed: Optional[int] = None
+
+
+@dataclass
+class FakeServerStats:
+    """What the fake server has seen."""
+    requests: int = 0
+    errors: int = 0
+    streamed: int = 0
+    latencies: List[float] = field(default_factory=list)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    """Threaded HTTP server replaying recorded completions."""
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, settings: Optional[FakeServerSettings] = None,
+                 completions: Optional[List[str]] = None, host: str = "127.0.0.1"):
+        super().__init__((host, port), FakeLLMHandler)
+        self.settings = settings or FakeServerSettings()
+        self.completions = completions or load_completions()
+        if not self.completions:
+            raise ValueError("No recorded completions found to replay")
+        self.stats = FakeServerStats()
+        self.random = random.Random(self.settings.seed)
+        self.prompt_cache: List[str] = []  # Most recently used last
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def start(self) -> "FakeLLMServer":
+        """Serve on a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def prefill(self, prompt: str, use_cache: bool) -> int:
+        """Characters of prompt that must be evaluated, after reusing the best cached prefix."""
+        with self.stats.lock:
+            best, reused = None, 0
+            if use_cache:
+                for cached in self.prompt_cache:
+                    common = len(os.path.commonprefix([cached, prompt]))
+                    if common > reused:
+                        best, reused = cached, common
+            if best is not None:
+                self.prompt_cache.remove(best)
+            self.prompt_cache.append(prompt)
+            del self.prompt_cache[:-self.settings.prompt_cache_slots]
+        return len(prompt) - reused
+
+    def remainder(self, messages: List[Dict[str, Any]]) -> Optional[str]:
+        """The rest of a recorded completion whose start is the conversation's last assistant reply."""
+        partial = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "assistant"), "")
+        if not partial:
+            return None
+        return next((c[len(partial):] for c in self.completions
+                     if len(c) > len(partial) and c.startswith(partial)), None)
+    
+    def draw(self) -> Dict[str, Any]:
+        """Decide latency, failure and completion for one request."""
+        with self.stats.lock:
+            delay = max(0.0, self.settings.latency
+                        + self.random.uniform(-self.settings.jitter, self.settings.jitter))
+            if self.random.random() < self.settings.slow_rate:
+                delay += self.settings.slow_latency
+            return {
+                "delay": delay,
+                "fail": self.random.random() < self.settings.error_rate,
+                "completion": self.random.choice(self.completions),
+            }
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: FakeLLMServer
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _send_json(self, status: int, body: Dict[str, Any],
+                   headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(body).encode("utf-8")
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client gave up (deadline or lost hedge)
+
+    def do_GET(self) -> None:
+        if self.path.rstrip("/") == f"{API_PREFIX}/models":
+            self._send_json(200, {"object": "list", "data": [{"id": "fake", "object": "model"}]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self) -> None:
+        if self.path != f"{API_PREFIX}/chat/completions":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        started = time.monotonic()
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        server = self.server
+        draw = server.draw()
+        time.sleep(draw["delay"])
+
+        with server.stats.lock:
+            server.stats.requests += 1
+            if draw["fail"]:
+                server.stats.errors += 1
+        if draw["fail"]:
+            retry_after = server.settings.retry_after
+            headers = {"Retry-After": f"{retry_after:g}"} if retry_after is not None else None
+            self._send_json(503, {"error": "server busy"}, headers)
+            return
+
+        prompt = "\n".join(m.get("content", "") for m in payload.get("messages", []))
+        prompt_tokens = len(prompt) // 4
+        prompt_n = server.prefill(prompt, bool(payload.get("cache_prompt"))) // 4
+        prompt_ms = prompt_n * server.settings.prefill_per_token * 1000
+        time.sleep(prompt_ms / 1000)
+
+        if (payload.get("response_format") or {}).get("type") == "json_schema":
+            draw["completion"] = constrain(draw["completion"])
+        remainder = server.remainder(payload.get("messages", []))
+        if remainder is not None:
+            draw["completion"] = remainder
+        
+        def truncate(completion: str) -> Tuple[str, str]:
+            """Cut a completion at max_tokens (four characters per token)."""
+            limit = payload.get("max_tokens")
+            if limit and len(completion) > limit * 4:
+                return completion[:limit * 4], "length"
+            return completion, "stop"
+
+        if payload.get("stream"):
+            self._stream(*truncate(draw["completion"]), prompt_tokens, prompt_n, prompt_ms)
+        else:
+            n = max(1, int(payload.get("n", 1)))
+            completions = [truncate(c) for c in [draw["completion"]]
+                           + [server.random.choice(server.completions) for _ in range(n - 1)]]
+            completion_tokens = sum(len(c) for c, _ in completions) // 4
+            self._send_json(200, {
+                "object": "chat.completion",
+                "model": payload.get("model", "fake"),
+                "choices": [
+                    {"index": i, "message": {"role": "assistant", "content": c}, "finish_reason": reason}
+                    for i, (c, reason) in enumerate(completions)
+                ],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                          "total_tokens": prompt_tokens + completion_tokens},
+                "timings": {"prompt_n": prompt_n, "prompt_ms": prompt_ms,
+                            "predicted_n": completion_tokens, "predicted_ms": completion_tokens * 10.0},
+            })
+
+        with server.stats.lock:
+            server.stats.latencies.append(time.monotonic() - started)
+
+    def _stream(self, completion: str, finish_reason: str, prompt_tokens: int, prompt_n: int,
+                prompt_ms: float) -> None:
+        """Send the completion as server-sent events; stop quietly if the client hangs up."""
+        settings = self.server.settings
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def send(event: str) -> None:
+            data = event.encode("utf-8")
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.wfile.flush()
+
+        step = settings.stream_chunk_chars
+        try:
+            for i in range(0, len(completion), step):
+                chunk = {"choices": [{"index": 0, "delta": {"content": completion[i:i + step]},
+                                      "finish_reason": None}]}
+                send(f"data: {json.dumps(chunk)}\n\n")
+                time.sleep(settings.stream_chunk_delay)
+            final = {"choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}],
+                     "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": len(completion) // 4},
+                     "timings": {"prompt_n": prompt_n, "prompt_ms": prompt_ms}}
+            send(f"data: {json.dumps(final)}\n\n")
+            send("data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        with self.server.stats.lock:
+            self.server.stats.streamed += 1
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--port", type=int, default=12434)
+    parser.add_argument("--latency", type=float, default=1.0)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=None)
+    parser.add_argument("--prefill-per-token", type=float, default=0.0)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--slow-latency", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    settings = FakeServerSettings(latency=args.latency, jitter=args.jitter,
+                                  error_rate=args.error_rate, retry_after=args.retry_after,
+                                  prefill_per_token=args.prefill_per_token, slow_rate=args.slow_rate,
+                                  slow_latency=args.slow_latency, seed=args.seed)
+    server = FakeLLMServer(args.port, settings, host="0.0.0.0")
+    print(f"Serving {len(server.completions)} recorded completions on port {server.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -6,22 +6,51 @@ Modified to work with Docker and improved with Pythonic best practices.
 import requests
 import json
 import hjson
+import argparse
+import gzip
+import hashlib
+import queue
 import time
 import os
 import re
 import logging
+import statistics
+import textwrap
+import threading
 import unicodedata
+import uuid
+from collections import Counter, OrderedDict, deque
+from collections.abc import Mapping
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
 from enum import Enum
 from functools import wraps, partial
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Any, Tuple, Union, Callable, TypeVar, cast
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Any, Tuple, Union, Callable, TypeVar, cast
+from urllib.parse import urlsplit
+
+from requests.adapters import HTTPAdapter
+
+from delphi_store import ResultsStore
+from delphi_vectors import ApiEmbedder, HashingEmbedder, VectorIndex, iter_chunks
 
 
 # Type definitions for better type hinting
 T = TypeVar('T')
 JsonDict = Dict[str, Any]
 
+API_PATH = '/engines/llama.cpp/v1'
+PROMPT_LAYOUTS = ('profile-first', 'shared-prefix')
+PANEL_PROGRESS_INTERVAL = 100  # Characters between progress lines in panel rounds
+FAILED_NAMES_SHOWN = 20  # Failed characters named in a round summary
+RUN_ID_FILE = 'run_id'  # Written to the round-one directory so --resume keeps the run id
+
+# Replaced by the configured logger in main()
+logger = logging.getLogger('delphi')
+
 
 # Enums for ratings and confidence levels
 class Rating(Enum):
@@ -50,24 +79,109 @@ class DelphiConfig:
     """Configuration for the Delphi simulation."""
     # API settings
     api_host: str = field(default_factory=lambda: os.environ.get('API_HOST', 'localhost'))
+    api_port: int = field(default_factory=lambda: int(os.environ.get('API_PORT', 12434)))
+    # Several backends as host, host:port or URLs; defaults to api_host:api_port
+    api_endpoints: List[str] = field(default_factory=lambda: [
+        e.strip() for e in os.environ.get('API_ENDPOINTS', '').split(',') if e.strip()
+    ])
+    endpoints: List[str] = field(init=False)
     base_url: str = field(init=False)
     model: str = 'ai/gemma3'
     temperature: float = 0.7
     max_tokens: int = 2048
-    api_timeout: int = 120
+    stream: bool = field(default_factory=lambda: os.environ.get('API_STREAM', '') == '1')
+    # profile-first, or shared-prefix to put the persona last and reuse the server's prompt cache
+    prompt_layout: str = field(default_factory=lambda: os.environ.get('PROMPT_LAYOUT', 'profile-first'))
+    constrained: bool = field(default_factory=lambda: os.environ.get('API_CONSTRAINED', '') == '1')  # Send a JSON schema
+    repair_attempts: int = 1  # Follow-up requests for missing or invalid questions, 0 disables
+    api_timeout: int = 120  # Read timeout per attempt
+    character_deadline: float = 0.0  # Seconds for all of a character's requests, 0 disables
+    round_deadline: float = 0.0  # Seconds for a whole round, 0 disables
+    # Duplicate a request still unanswered at this percentile of recent latencies (e.g. 95), 0 disables
+    hedge_percentile: float = field(default_factory=lambda: float(os.environ.get('HEDGE_PERCENTILE', 0)))
+    hedge_min_samples: int = 20  # Latencies observed before hedging starts
+    api_connect_timeout: float = 10.0
     api_max_retries: int = 3
     
+    # HTTP client and rate limiting
+    http_pool_size: int = 10  # Keep-alive connections held open to the API
+    rate_limit: float = 5.0  # Requests per second per endpoint, backs off automatically on 429/503
+    health_check_interval: float = 15.0  # Seconds between endpoint health checks, 0 disables
+    endpoint_max_failures: int = 2  # Consecutive failures before an endpoint is ejected
+    endpoint_eject_seconds: float = 30.0  # How long an ejected endpoint is skipped
+    client: 'ApiClient' = field(init=False, repr=False)
+    
+    # Execution settings
+    max_concurrency: int = field(default_factory=lambda: int(os.environ.get('MAX_CONCURRENCY', 4)))  # Per endpoint
+    
     # Output settings
     output_dir: Path = field(default=Path('delphi_round1'))
     composite_json: Path = field(default=Path('round1_responses.json'))
+    journal_file: Path = field(default=Path('round1_journal.jsonl'))
+    resume: bool = False  # Reuse results recorded in the journal by an interrupted run
     log_file: Path = field(default=Path('logs/delphi_process.log'))  # Changed this line
+    event_log: Optional[Path] = field(default=Path('logs/delphi_events.jsonl'))  # JSONL records, None disables
+    log_level: str = field(default_factory=lambda: os.environ.get('LOG_LEVEL', 'INFO').upper())  # DEBUG adds per-call detail
     debug_dir: Path = field(default=Path('debug_output'))
+    profile_dir: Path = field(default=Path('profiles'))
+    questionnaire: Optional[Path] = None  # Defaults to initial-question.md or questionnaire.md
+    assets: 'PromptAssets' = field(init=False, repr=False)
+    debug_level: str = field(default_factory=lambda: os.environ.get('DEBUG_LEVEL', 'failures'))  # off, failures, full
+    debug_compress: bool = False  # Gzip debug artifacts
+    debug_writer: 'DebugWriter' = field(init=False, repr=False)
+    # Timestamp plus a random suffix, so runs started in the same second stay apart
+    run_id: str = field(default_factory=lambda: f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}")
+    
+    # Response cache settings
+    use_cache: bool = True
+    cache_dir: Path = field(default=Path('cache'))
+    cache_max_entries: int = 500
+    cache_max_bytes: int = 256 * 1024 * 1024
+    cache_max_age: float = 30 * 24 * 3600  # Seconds
+    cache: 'ResponseCache' = field(init=False, repr=False)
+    
+    # Results store: every run's answers, appended for cross-run queries (None disables)
+    results_db: Optional[Path] = field(
+        default_factory=lambda: Path(os.environ.get('RESULTS_DB', 'results/delphi.sqlite')))
+    store: Optional[ResultsStore] = field(init=False, repr=False)
+    
+    # Vector index of panel explanations, extended as each round finishes (None disables)
+    vector_dir: Optional[Path] = field(
+        default_factory=lambda: Path(os.environ['VECTOR_INDEX']) if os.environ.get('VECTOR_INDEX') else None)
+    embedding_model: Optional[str] = field(
+        default_factory=lambda: os.environ.get('EMBEDDING_MODEL') or None)  # None uses offline hashing
+    retrieved_arguments: int = 0  # Related arguments per question shown in later rounds
+    vectors: Optional[VectorIndex] = field(init=False, repr=False)
+    
+    stats: 'RunStats' = field(init=False, repr=False)
+    metrics: 'RunMetrics' = field(init=False, repr=False)
+    
+    # Token budget: max_tokens sized from each persona's observed answer lengths, capped at max_tokens
+    adaptive_max_tokens: bool = True
+    budget_headroom: float = 1.25  # Budget as a multiple of the persona's longest recent answer
+    min_max_tokens: int = 512
+    context_window: int = field(default_factory=lambda: int(os.environ.get('CONTEXT_WINDOW', 0)))  # 0 if unknown
+    continuation_attempts: int = 2  # Follow-up requests when an answer is cut off at max_tokens
+    budget: 'TokenBudget' = field(init=False, repr=False)
+    
+    # Ensemble settings
+    samples: int = 1  # Completions per character; more than one enables ensemble mode
+    
+    # Multi-round settings
+    rounds: int = 1
+    feedback_summaries: int = 3  # Representative summaries per question in feedback
+    feedback_summary_chars: int = 240  # Length limit for each summary in feedback
     
     # Response parameters
     question_count: int = 6
     rating_range: Tuple[int, int] = (1, 7)  # min, max
     confidence_range: Tuple[int, int] = (1, 5)  # min, max
     
+    # Large panels: a directory of .txt profiles or a JSONL file of {"name", "profile"}
+    # lines, read lazily instead of `characters`; results are streamed to JSONL
+    panel: Optional[Path] = field(default_factory=lambda: Path(os.environ['PANEL']) if os.environ.get('PANEL') else None)
+    merge_composite: bool = False  # Also write the round{n}_responses.json layout after a panel round
+    
     # Character list
     characters: List[str] = field(default_factory=lambda: [
         "bugs-bunny", "rick-sanchez", "stewie-griffin", "doraemon",
@@ -75,12 +189,47 @@ class DelphiConfig:
         "lisa-simpson", "twilight-sparkle"
     ])
     
+    # Long-lived config whose HTTP client, caches, stores and loaded files this one reuses
+    shared: Optional['DelphiConfig'] = field(default=None, repr=False, compare=False)
+    concurrent_runs: int = 1  # Runs sharing this config's client at once, e.g. service workers
+    
     def __post_init__(self):
         """Initialize derived attributes after initialization."""
-        self.base_url = f'http://{self.api_host}:12434/engines/llama.cpp/v1'
+        if self.prompt_layout not in PROMPT_LAYOUTS:
+            raise ValueError(f"Unknown prompt layout {self.prompt_layout!r}, expected one of {PROMPT_LAYOUTS}")
+        self.endpoints = ([endpoint_url(e, self.api_port) for e in self.api_endpoints]
+                          or [f'http://{self.api_host}:{self.api_port}{API_PATH}'])
+        self.base_url = self.endpoints[0]
+        run_id_path = self.output_dir / RUN_ID_FILE
+        if self.resume and run_id_path.exists():
+            # Continue under the interrupted run's id so its results and index entries are reused
+            self.run_id = run_id_path.read_text(encoding="utf-8").strip() or self.run_id
+        if self.shared is not None:
+            # Warm state stays owned (and is closed) by the shared config
+            self.client = self.shared.client
+            self.cache = self.shared.cache
+            self.budget = self.shared.budget
+            self.store = self.shared.store
+            self.vectors = self.shared.vectors
+        else:
+            self.client = ApiClient(self)
+            self.cache = ResponseCache(self.cache_dir, self.cache_max_entries, self.cache_max_age,
+                                       self.cache_max_bytes)
+            self.budget = TokenBudget(self.cache_dir / "token_budget.json")
+            self.store = ResultsStore(self.results_db) if self.results_db else None
+            self.vectors = None
+            if self.vector_dir:
+                embedder = (ApiEmbedder(self.base_url, self.embedding_model) if self.embedding_model
+                            else HashingEmbedder())
+                self.vectors = VectorIndex(self.vector_dir, embedder)
+        self.stats = RunStats()
+        self.metrics = RunMetrics(self.run_id)
+        self.assets = PromptAssets(self, self.shared.assets if self.shared is not None else None)
+        self.debug_writer = DebugWriter(self.debug_dir / self.run_id, 
+                                        self.debug_level, self.debug_compress)
         
         # Create directories
-        self.output_dir.mkdir(exist_ok=True)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
         self.debug_dir.mkdir(exist_ok=True)
         self.log_file.parent.mkdir(exist_ok=True)
 
@@ -136,29 +285,101 @@ EXAMPLE_JSON = """
 """
 
 
+class ContextFilter(logging.Filter):
+    """Stamp records with the run and character of the thread that logged them."""
+    def __init__(self, run_id: str):
+        super().__init__()
+        self.run_id = run_id
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        metrics = getattr(_context, "metrics", None)
+        record.run_id = (metrics.run_id if metrics is not None
+                         else getattr(_context, "run_id", None) or self.run_id)
+        record.character = getattr(_context, "character", None) or "-"
+        return True
+
+
+class DeferredQueueHandler(QueueHandler):
+    """Queue records as they are, leaving %-formatting to the listener thread."""
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info and not record.exc_text:
+            # Tracebacks reference frames that may change once the worker moves on
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with the message template and its arguments kept apart."""
+    def format(self, record: logging.LogRecord) -> str:
+        event = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "run_id": getattr(record, "run_id", None),
+            "character": None if getattr(record, "character", "-") == "-" else record.character,
+            "thread": record.threadName,
+            "msg": str(record.msg),
+            "args": list(record.args) if isinstance(record.args, tuple) else record.args,
+            "message": record.getMessage(),
+        }
+        if record.exc_text:
+            event["exc"] = record.exc_text
+        return json.dumps(event, default=str)
+
+
+# Background thread writing queued records to the configured handlers
+_log_listener: Optional[QueueListener] = None
+
+
 def setup_logging(config: DelphiConfig) -> logging.Logger:
-    """Set up logging with both console and file handlers."""
-    logger = logging.getLogger('delphi')
-    logger.setLevel(logging.INFO)
+    """Log through a queue to the console, the text log and the JSONL event log.
     
-    # Create formatters
-    formatter = logging.Formatter('[%(asctime)s] %(levelname)s: %(message)s', 
-                                   datefmt='%Y-%m-%d %H:%M:%S')
+    Worker threads only enqueue records; a listener thread formats and
+    writes them. Calling this again replaces the previous configuration.
+    """
+    stop_logging()
+    logger = logging.getLogger('delphi')
+    logger.setLevel(config.log_level)
     
-    # Add console handler if not already present
-    if not any(isinstance(h, logging.StreamHandler) for h in logger.handlers):
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter('[%(asctime)s] %(levelname)s: %(message)s',
+                                                   datefmt='%Y-%m-%d %H:%M:%S'))
+    # Appended, so earlier runs stay in the log; run and character tell them apart
+    file_handler = logging.FileHandler(config.log_file, mode='a', encoding='utf-8')
+    file_handler.setFormatter(logging.Formatter(
+        '[%(asctime)s] %(levelname)s %(run_id)s %(character)s: %(message)s', datefmt='%Y-%m-%d %H:%M:%S'))
+    handlers: List[logging.Handler] = [console_handler, file_handler]
+    if config.event_log is not None:
+        config.event_log.parent.mkdir(parents=True, exist_ok=True)
+        event_handler = logging.FileHandler(config.event_log, mode='a', encoding='utf-8')
+        event_handler.setFormatter(JsonFormatter())
+        handlers.append(event_handler)
     
-    # Add file handler
-    file_handler = logging.FileHandler(config.log_file, mode='w')
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+    log_queue: 'queue.Queue[logging.LogRecord]' = queue.Queue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter(config.run_id))
+    logger.addHandler(queue_handler)
     
+    global _log_listener
+    _log_listener = QueueListener(log_queue, *handlers)
+    _log_listener.start()
     return logger
 
 
+def stop_logging() -> None:
+    """Write out queued records and close the handlers set up by setup_logging."""
+    global _log_listener
+    if _log_listener is None:
+        return
+    logger = logging.getLogger('delphi')
+    for handler in [h for h in logger.handlers if isinstance(h, DeferredQueueHandler)]:
+        logger.removeHandler(handler)
+    _log_listener.stop()
+    for handler in _log_listener.handlers:
+        handler.close()
+    _log_listener = None
+
+
 def retry(max_retries: int = 3, backoff_factor: float = 2.0):
     """Retry decorator with exponential backoff."""
     def decorator(func: Callable[..., T]) -> Callable[..., T]:
@@ -168,13 +389,25 @@ def retry(max_retries: int = 3, backoff_factor: float = 2.0):
             for attempt in range(1, max_retries + 1):
                 try:
                     return func(*args, **kwargs)
+                except DeadlineExceeded:
+                    raise
                 except Exception as e:
                     last_error = e
                     if attempt == max_retries:
-                        logger.error(f"All {max_retries} attempts failed. Last error: {str(e)}")
+                        logger.error("All %s attempts failed. Last error: %s", max_retries, e)
                         raise
                     wait_time = backoff_factor ** (attempt - 1)
-                    logger.warning(f"Attempt {attempt} failed: {str(e)}. Retrying in {wait_time}s...")
+                    # Honour server-provided Retry-After hints when they are longer
+                    wait_time = max(wait_time, getattr(e, 'retry_after', None) or 0)
+                    # No need to wait when another endpoint can take the retry
+                    if getattr(e, 'failover', False):
+                        wait_time = 0
+                    remaining = remaining_time()
+                    if remaining is not None and remaining <= wait_time:
+                        raise DeadlineExceeded(f"Deadline reached after attempt {attempt}: {str(e)}") from e
+                    logger.warning("Attempt %s failed: %s. Retrying in %ss...",
+                                   attempt, e, wait_time)
+                    record_metric("retries")
                     time.sleep(wait_time)
             # This should never be reached due to the raise in the loop,
             # but it's needed for type checking
@@ -183,6 +416,1103 @@ def retry(max_retries: int = 3, backoff_factor: float = 2.0):
     return decorator
 
 
+class ApiError(Exception):
+    """Raised when the API returns a non-success status code."""
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"API Error {status_code}: {message}")
+        self.status_code = status_code
+
+
+class ApiThrottledError(ApiError):
+    """Raised when the API signals overload (429/503)."""
+    def __init__(self, status_code: int, message: str, retry_after: Optional[float] = None):
+        super().__init__(status_code, message)
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a character's or round's deadline leaves no time for a request."""
+
+
+class RequestCancelled(Exception):
+    """Raised in a hedged request that lost to its duplicate."""
+
+
+def endpoint_url(spec: str, default_port: int) -> str:
+    """Expand host, host:port or a bare server URL into an API base URL."""
+    if '://' not in spec:
+        spec = f'http://{spec}'
+    parts = urlsplit(spec)
+    if parts.port is None:
+        spec = spec.replace(parts.netloc, f'{parts.netloc}:{default_port}', 1)
+    if not parts.path.strip('/'):
+        spec = spec.rstrip('/') + API_PATH
+    return spec.rstrip('/')
+
+
+def is_backend_failure(error: Exception) -> bool:
+    """Whether an error says the backend is unhealthy, rather than busy or the request bad."""
+    if isinstance(error, (ApiThrottledError, DeadlineExceeded, RequestCancelled)):
+        return False
+    if isinstance(error, ApiError):
+        return error.status_code >= 500
+    return True
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """Token bucket with a concurrency cap that adapts to server back-pressure.
+    
+    The request rate is halved whenever the server throttles us and recovers
+    gradually towards the configured maximum on each successful call.
+    """
+    def __init__(self, rate: float, max_in_flight: int, min_rate: float = 0.1):
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate) if rate > 0 else min_rate
+        self.rate = rate
+        self.capacity = max(1.0, float(max_in_flight))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(1, max_in_flight))
+    
+    def _take_token(self) -> None:
+        """Block until a token is available and no back-off is in effect.
+        
+        Server back-off applies even without a rate limit. Raises
+        DeadlineExceeded if this thread's deadline passes while waiting.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                elif self.max_rate <= 0:
+                    return
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            remaining = remaining_time()
+            if remaining is not None:
+                if remaining <= 0:
+                    raise DeadlineExceeded("Deadline reached waiting for the rate limiter")
+                wait = min(wait, remaining)
+            time.sleep(wait)
+    
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Hold one in-flight request slot for the duration of the block."""
+        remaining = remaining_time()
+        if not self._slots.acquire(timeout=None if remaining is None else max(0.0, remaining)):
+            raise DeadlineExceeded("Deadline reached waiting for a request slot")
+        try:
+            self._take_token()
+            yield
+        finally:
+            self._slots.release()
+    
+    def throttled(self, retry_after: Optional[float] = None) -> None:
+        """Back off after the server reported overload."""
+        with self._lock:
+            if self.max_rate > 0:
+                self.rate = max(self.min_rate, self.rate / 2)
+                self.tokens = 0.0
+            pause = retry_after if retry_after is not None else (1 / self.rate if self.rate > 0 else 1.0)
+            self.blocked_until = max(self.blocked_until, time.monotonic() + pause)
+        if self.max_rate > 0:
+            logger.warning("API throttled, backing off %.1fs (rate now %.2f req/s)", pause, self.rate)
+        else:
+            logger.warning("API throttled, backing off %.1fs", pause)
+    
+    def succeeded(self) -> None:
+        """Recover the request rate after a successful call."""
+        if self.max_rate <= 0:
+            return
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.1)
+
+
+class ResponsesStreamParser:
+    """Incrementally track JSON nesting in a streamed completion.
+    
+    Characters before the first '{' (code fences, chatter) are ignored. The
+    parser reports completion once `target_entries` objects have closed inside
+    the top-level array (the "responses" list) or the top-level object closes.
+    """
+    CLOSERS = {'{': '}', '[': ']'}
+    
+    def __init__(self, target_entries: int):
+        self.target_entries = target_entries
+        self.chunks: List[str] = []
+        self.length = 0
+        self.stack: List[str] = []
+        self.in_string = False
+        self.escape = False
+        self.start: Optional[int] = None
+        self.end: Optional[int] = None
+        self.entries = 0
+    
+    def feed(self, chunk: str) -> bool:
+        """Consume a chunk of text; return True once enough entries are complete."""
+        base = self.length
+        self.chunks.append(chunk)
+        self.length += len(chunk)
+        if self.end is not None:
+            return True
+        
+        for offset, char in enumerate(chunk):
+            if self.start is None:
+                if char != '{':
+                    continue
+                self.start = base + offset
+            
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == '\\':
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in '{[':
+                self.stack.append(char)
+            elif char in '}]' and self.stack:
+                self.stack.pop()
+                if not self.stack:
+                    self.end = base + offset + 1
+                    return True
+                if char == '}' and self.stack == ['{', '[']:
+                    self.entries += 1
+                    if self.entries >= self.target_entries:
+                        self.end = base + offset + 1
+                        return True
+        return False
+    
+    @property
+    def text(self) -> str:
+        """Everything received so far."""
+        return ''.join(self.chunks)
+    
+    def completed_json(self) -> str:
+        """The JSON object up to the stop point, with open brackets closed."""
+        text = self.text
+        if self.start is None or self.end is None:
+            return text
+        closing = ''.join(self.CLOSERS[c] for c in reversed(self.stack))
+        return text[self.start:self.end] + closing
+
+
+class Endpoint:
+    """One API backend with its own rate limiter and health state."""
+    def __init__(self, url: str, rate: float, max_in_flight: int):
+        self.url = url
+        self.limiter = RateLimiter(rate, max_in_flight)
+        self.outstanding = 0
+        self.failures = 0  # Consecutive
+        self.ejected_until = 0.0
+        self.requests = 0
+
+
+class EndpointPool:
+    """Routes requests to the endpoint with the fewest outstanding requests.
+    
+    Endpoints that fail repeatedly are ejected for a while; they are
+    re-admitted when the ejection expires, a request to them succeeds
+    or a health check passes.
+    """
+    def __init__(self, urls: List[str], rate: float, max_in_flight: int,
+                 max_failures: int = 2, eject_seconds: float = 30.0):
+        self.endpoints = [Endpoint(url, rate, max_in_flight) for url in urls]
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_failures = max(1, max_failures)
+        self.eject_seconds = eject_seconds
+        self._turn = 0  # Rotates the tie-break between equally loaded endpoints
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self.endpoints)
+    
+    def _available(self, now: float) -> List[Endpoint]:
+        return [e for e in self.endpoints if e.ejected_until <= now]
+    
+    @contextmanager
+    def acquire(self) -> Iterator[Endpoint]:
+        """Reserve the least loaded admitted endpoint for the duration of the block."""
+        with self._lock:
+            candidates = self._available(time.monotonic())
+            if not candidates:
+                # Everything is ejected: try the one due back soonest rather than fail
+                candidates = [min(self.endpoints, key=lambda e: e.ejected_until)]
+            self._turn = (self._turn + 1) % len(candidates)
+            rotated = candidates[self._turn:] + candidates[:self._turn]
+            endpoint = min(rotated, key=lambda e: e.outstanding)
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+        try:
+            yield endpoint
+        finally:
+            with self._lock:
+                endpoint.outstanding -= 1
+    
+    def has_capacity(self) -> bool:
+        """Whether an admitted endpoint could take another request without queueing."""
+        with self._lock:
+            return any(e.outstanding < self.max_in_flight for e in self._available(time.monotonic()))
+    
+    def succeeded(self, endpoint: Endpoint) -> None:
+        """Reset the failure count and re-admit the endpoint if it was ejected."""
+        with self._lock:
+            endpoint.failures = 0
+            readmitted = endpoint.ejected_until > 0
+            endpoint.ejected_until = 0.0
+        if readmitted:
+            logger.info("Endpoint %s re-admitted", endpoint.url)
+    
+    def failed(self, endpoint: Endpoint) -> bool:
+        """Count a backend failure, ejecting the endpoint after too many.
+        
+        Returns True if another endpoint is available to retry on.
+        """
+        with self._lock:
+            endpoint.failures += 1
+            now = time.monotonic()
+            ejected = (len(self.endpoints) > 1 and endpoint.failures >= self.max_failures
+                       and endpoint.ejected_until <= now)
+            if ejected:
+                endpoint.ejected_until = now + self.eject_seconds
+            others = [e for e in self._available(now) if e is not endpoint]
+        if ejected:
+            logger.warning("Endpoint %s ejected for %.0fs after %s consecutive failures",
+                           endpoint.url, self.eject_seconds, endpoint.failures)
+        return bool(others)
+    
+    def check_health(self, session: requests.Session, timeout: float) -> None:
+        """Probe each endpoint's model list, ejecting or re-admitting it."""
+        for endpoint in self.endpoints:
+            try:
+                healthy = session.get(f"{endpoint.url}/models", timeout=timeout).status_code == 200
+            except requests.RequestException:
+                healthy = False
+            if healthy:
+                if endpoint.ejected_until > 0:
+                    self.succeeded(endpoint)
+                continue
+            with self._lock:
+                newly_ejected = endpoint.ejected_until <= time.monotonic()
+                endpoint.failures = max(endpoint.failures, self.max_failures)
+                endpoint.ejected_until = time.monotonic() + self.eject_seconds
+            if newly_ejected:
+                logger.warning("Endpoint %s failed its health check, ejected", endpoint.url)
+    
+    def request_counts(self) -> Dict[str, int]:
+        """Requests routed to each endpoint so far."""
+        with self._lock:
+            return {e.url: e.requests for e in self.endpoints}
+
+
+class LatencyTracker:
+    """Recent successful request latencies, for hedging thresholds."""
+    def __init__(self, size: int = 200):
+        self._latencies: Deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+    
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._latencies.append(seconds)
+    
+    def percentile(self, percentile: float, min_samples: int = 1) -> Optional[float]:
+        """The given percentile of recent latencies, or None with fewer than min_samples."""
+        with self._lock:
+            if len(self._latencies) < max(1, min_samples):
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(percentile / 100 * len(ordered)))]
+
+
+class ApiClient:
+    """Shared keep-alive HTTP session and endpoint pool owned by a run."""
+    # SSE events read after the responses are complete, waiting for the final usage event
+    TRAILING_EVENTS = 8
+    
+    def __init__(self, config: 'DelphiConfig'):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=len(config.endpoints),
+            pool_maxsize=config.http_pool_size,
+            pool_block=True
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+        self.timeout = (config.api_connect_timeout, config.api_timeout)
+        self.endpoints = EndpointPool(config.endpoints, config.rate_limit, config.max_concurrency,
+                                      config.endpoint_max_failures, config.endpoint_eject_seconds)
+        self.latencies = LatencyTracker()
+        
+        # Hedged requests run here while the worker that made them waits for the first answer;
+        # each run sharing the client has one worker per slot, each with up to two requests
+        self.hedge_executor = None
+        if config.hedge_percentile > 0:
+            self.hedge_executor = ThreadPoolExecutor(
+                max_workers=2 * config.max_concurrency * len(config.endpoints) * config.concurrent_runs,
+                thread_name_prefix="delphi-hedge"
+            )
+        
+        # Health checks only matter when there is somewhere else to send requests
+        self._stop = threading.Event()
+        self._health_thread = None
+        if len(self.endpoints) > 1 and config.health_check_interval > 0:
+            self._health_thread = threading.Thread(
+                target=self._health_loop, args=(config.health_check_interval,),
+                name="delphi-health", daemon=True
+            )
+            self._health_thread.start()
+    
+    def _health_loop(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            self.endpoints.check_health(self.session, self.timeout[0])
+    
+    def post_json(self, endpoint: Endpoint, path: str, payload: JsonDict,
+                  timeout: Optional[Tuple[float, float]] = None) -> JsonDict:
+        """POST a JSON payload through the endpoint's limiter and return the decoded body."""
+        limiter = endpoint.limiter
+        with limiter.slot():
+            response = self.session.post(f"{endpoint.url}{path}", json=payload,
+                                         timeout=timeout or self.timeout)
+        
+        if response.status_code in (429, 503):
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            limiter.throttled(retry_after)
+            raise ApiThrottledError(response.status_code, response.text, retry_after)
+        
+        if response.status_code != 200:
+            raise ApiError(response.status_code, response.text)
+        
+        limiter.succeeded()
+        return response.json()
+    
+    def stream_chat(self, endpoint: Endpoint, path: str, payload: JsonDict, target_entries: int,
+                    timeout: Optional[Tuple[float, float]] = None,
+                    cancel: Optional[threading.Event] = None) -> JsonDict:
+        """Consume an SSE chat completion, stopping once the responses are complete.
+        
+        Once they are, up to TRAILING_EVENTS more events are read for the
+        final one carrying usage and timings; a model still generating after
+        that is stopped, and its completion tokens are estimated and marked
+        "estimated" in the usage.
+        
+        Returns a body shaped like a non-streamed completion, with an extra
+        "stream_stats" entry holding time-to-first-token and early-stop info.
+        Setting `cancel`, or passing the thread's deadline, closes the
+        connection, which stops generation on the server.
+        """
+        parser = ResponsesStreamParser(target_entries)
+        finish_reason = None
+        usage = None
+        timings = None
+        ttft = None
+        complete = False
+        trailing = 0
+        early_stop = False
+        limiter = endpoint.limiter
+        # OpenAI-compatible servers only report usage for streams when asked
+        payload = {**payload, "stream_options": {"include_usage": True}}
+        
+        with limiter.slot():
+            started = time.monotonic()
+            response = self.session.post(f"{endpoint.url}{path}", json=payload,
+                                         timeout=timeout or self.timeout, stream=True)
+            try:
+                if response.status_code in (429, 503):
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                    limiter.throttled(retry_after)
+                    raise ApiThrottledError(response.status_code, response.text, retry_after)
+                
+                if response.status_code != 200:
+                    raise ApiError(response.status_code, response.text)
+                
+                for line in response.iter_lines(chunk_size=None):
+                    if cancel is not None and cancel.is_set():
+                        raise RequestCancelled("Hedged request lost to its duplicate")
+                    remaining = remaining_time()
+                    if remaining is not None and remaining <= 0:
+                        raise DeadlineExceeded("Deadline reached while streaming")
+                    if not line.startswith(b'data:'):
+                        continue
+                    data = line[5:].strip()
+                    if data == b'[DONE]':
+                        break
+                    event = json.loads(data)
+                    usage = event.get("usage") or usage
+                    timings = event.get("timings") or timings
+                    choice = (event.get("choices") or [{}])[0]
+                    finish_reason = choice.get("finish_reason") or finish_reason
+                    if complete:
+                        if usage is not None:
+                            break
+                        trailing += 1
+                        if trailing > self.TRAILING_EVENTS:
+                            # Closing the connection tells the server to stop generating
+                            logger.debug("All %s responses received, stopping generation early",
+                                        target_entries)
+                            early_stop = True
+                            break
+                        continue
+                    delta = (choice.get("delta") or {}).get("content")
+                    if not delta:
+                        continue
+                    if ttft is None:
+                        ttft = time.monotonic() - started
+                        logger.debug("Time to first token: %.2fs", ttft)
+                    complete = parser.feed(delta) and finish_reason is None
+            finally:
+                response.close()
+        
+        limiter.succeeded()
+        if early_stop and usage is None:
+            usage = {"completion_tokens": estimate_tokens(parser.text), "estimated": True}
+        content = parser.completed_json() if complete else parser.text
+        return {
+            "choices": [{
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "early_stop" if early_stop else finish_reason
+            }],
+            "usage": usage,
+            "timings": timings,
+            "stream_stats": {
+                "time_to_first_token": ttft,
+                "duration": time.monotonic() - started,
+                "early_stop": early_stop
+            }
+        }
+    
+    def close(self) -> None:
+        """Stop health checks and release pooled connections."""
+        self._stop.set()
+        if self._health_thread:
+            self._health_thread.join()
+        if self.hedge_executor is not None:
+            self.hedge_executor.shutdown(wait=False)
+        self.session.close()
+
+
+class RunStats:
+    """Thread-safe named counters for a run."""
+    def __init__(self):
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+    
+    def incr(self, name: str, amount: int = 1) -> None:
+        """Increment a counter."""
+        with self._lock:
+            self._counts[name] += amount
+    
+    def __getitem__(self, name: str) -> int:
+        with self._lock:
+            return self._counts[name]
+    
+    def snapshot(self) -> Counter:
+        """A copy of the current counts."""
+        with self._lock:
+            return Counter(self._counts)
+
+
+class TokenBudget:
+    """Per-request max_tokens from the completion lengths observed for each persona.
+    
+    A persona's budget is its longest recent answer times the headroom.
+    Personas not seen yet get the panel-wide 95th percentile, and everyone
+    gets config.max_tokens until enough answers have been observed.
+    Observations are saved to `path` so later runs start with sized budgets.
+    Only the most recently seen MAX_PERSONAS personas keep their own history,
+    so large panels fall back to the panel-wide figure instead of growing
+    the saved file without limit.
+    """
+    HISTORY = 20  # Recent answer lengths kept per persona
+    PANEL_HISTORY = 500  # Recent answer lengths kept across the panel
+    MIN_OBSERVATIONS = 5  # Panel-wide answers needed before budgets shrink
+    MAX_PERSONAS = 256  # Personas with their own history, least recently seen dropped first
+    
+    def __init__(self, path: Optional[Path]):
+        self.path = path
+        self._lengths: 'OrderedDict[str, Deque[int]]' = OrderedDict()
+        self._recent: Deque[int] = deque(maxlen=self.PANEL_HISTORY)
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+    
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            saved = json.loads(self.path.read_text(encoding="utf-8"))
+            for character, lengths in list(saved.get("personas", {}).items())[-self.MAX_PERSONAS:]:
+                self._lengths[character] = deque(lengths, maxlen=self.HISTORY)
+            self._recent.extend(saved.get("recent", []))
+        except Exception as e:
+            logger.error("Error loading token budget %s: %s", self.path, e)
+    
+    def max_tokens(self, config: DelphiConfig, character: str, prompt_tokens: int = 0) -> int:
+        """The completion budget for a character's next request."""
+        ceiling = config.max_tokens
+        floor = min(config.min_max_tokens, ceiling)
+        with self._lock:
+            self._load()
+            lengths = self._lengths.get(character)
+            if lengths:
+                self._lengths.move_to_end(character)
+                observed: Optional[int] = max(lengths)
+            elif len(self._recent) >= self.MIN_OBSERVATIONS:
+                ordered = sorted(self._recent)
+                observed = ordered[int(0.95 * (len(ordered) - 1))]
+            else:
+                observed = None
+        budget = ceiling
+        if observed is not None:
+            budget = min(ceiling, max(floor, int(observed * config.budget_headroom)))
+        if config.context_window:
+            # Never ask for more than the context has room for after the prompt
+            budget = min(budget, max(floor, config.context_window - prompt_tokens))
+        return budget
+    
+    def observe(self, character: str, completion_tokens: int) -> None:
+        """Record the length of a complete answer."""
+        if completion_tokens <= 0:
+            return
+        with self._lock:
+            self._load()
+            self._lengths.setdefault(character, deque(maxlen=self.HISTORY)).append(completion_tokens)
+            self._lengths.move_to_end(character)
+            if len(self._lengths) > self.MAX_PERSONAS:
+                self._lengths.popitem(last=False)
+            self._recent.append(completion_tokens)
+    
+    def save(self) -> None:
+        """Write the observations for the next run."""
+        if self.path is None:
+            return
+        with self._lock:
+            if not self._lengths:
+                return
+            data = {"personas": {c: list(v) for c, v in self._lengths.items()},
+                    "recent": list(self._recent)}
+        try:
+            # Jobs sharing this budget save concurrently; each replace must see a complete file
+            with self._save_lock:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+                tmp_path.write_text(json.dumps(data), encoding="utf-8")
+                tmp_path.replace(self.path)
+        except Exception as e:
+            logger.error("Error saving token budget %s: %s", self.path, e)
+
+
+def prometheus_label(value: Any) -> str:
+    """Escape a label value for the Prometheus text format."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class RunMetrics:
+    """Stage timings, retries and token usage for one round.
+    
+    Kept per character by default. Panel rounds pass per_character=False
+    and keep only round totals per stage and counter, so neither memory nor
+    the exported series grow with the panel. Exported as JSON and in the
+    Prometheus text exposition format.
+    """
+    AVERAGED = ("time_to_first_token", "prompt_eval_seconds")  # Totals reported as a mean per request
+    
+    def __init__(self, run_id: str, round_number: int = 1, per_character: bool = True):
+        self.run_id = run_id
+        self.round_number = round_number
+        self.per_character = per_character
+        self._characters: Dict[str, Dict[str, Counter]] = {}
+        self._totals = self._new_entry()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _new_entry() -> Dict[str, Counter]:
+        return {"stages": Counter(), "counters": Counter(), "samples": Counter()}
+    
+    def _entry(self, character: str) -> Dict[str, Counter]:
+        if not self.per_character:
+            return self._totals
+        return self._characters.setdefault(character, self._new_entry())
+    
+    def add_time(self, character: str, stage: str, seconds: float) -> None:
+        """Accumulate time spent in a stage."""
+        with self._lock:
+            entry = self._entry(character)
+            entry["stages"][stage] += seconds
+            entry["samples"][stage] += 1
+    
+    def add(self, character: str, counter: str, amount: float = 1) -> None:
+        """Accumulate a counter such as retries or tokens."""
+        with self._lock:
+            entry = self._entry(character)
+            entry["counters"][counter] += amount
+            entry["samples"][counter] += 1
+    
+    @staticmethod
+    def _summarize(entry: Dict[str, Counter]) -> JsonDict:
+        """An entry's stage times and counters plus derived tokens/sec and budget use."""
+        counters = dict(entry["counters"])
+        api_seconds = entry["stages"].get("api", 0.0)
+        if api_seconds and counters.get("completion_tokens"):
+            counters["tokens_per_second"] = counters["completion_tokens"] / api_seconds
+        if counters.get("budget_tokens"):
+            counters["budget_used"] = counters.get("completion_tokens", 0) / counters["budget_tokens"]
+        return {"stages": dict(entry["stages"]), **counters}
+    
+    def to_json(self) -> JsonDict:
+        """Per-character metrics (or round totals for panels), plus per-stage totals."""
+        with self._lock:
+            if not self.per_character:
+                totals = self._summarize(self._totals)
+                for key in self.AVERAGED:
+                    if key in totals:
+                        totals[key] /= self._totals["samples"][key]
+                return {
+                    "run_id": self.run_id,
+                    "round": self.round_number,
+                    "characters_processed": self._totals["samples"]["total"],
+                    "stage_totals": totals["stages"],
+                    "totals": totals
+                }
+            characters = {}
+            stage_totals: Counter = Counter()
+            for character, entry in self._characters.items():
+                characters[character] = self._summarize(entry)
+                stage_totals.update(entry["stages"])
+        return {
+            "run_id": self.run_id,
+            "round": self.round_number,
+            "stage_totals": dict(stage_totals),
+            "characters": characters
+        }
+    
+    def to_prometheus(self) -> str:
+        """Metrics in the Prometheus text exposition format."""
+        data = self.to_json()
+        base = f'run="{prometheus_label(self.run_id)}",round="{self.round_number}"'
+        if self.per_character:
+            series = [(f'{base},character="{prometheus_label(c)}"', e) for c, e in data["characters"].items()]
+        else:
+            series = [(base, data["totals"])]
+        lines = [
+            "# HELP delphi_stage_seconds Time spent per character and pipeline stage.",
+            "# TYPE delphi_stage_seconds gauge"
+        ]
+        for labels, entry in series:
+            for stage, seconds in entry["stages"].items():
+                lines.append(f'delphi_stage_seconds{{{labels},stage="{stage}"}} {seconds:.6f}')
+        
+        counters = [
+            ("retries", "delphi_retries_total", "counter", "API call retries per character."),
+            ("prompt_tokens", "delphi_prompt_tokens_total", "counter", "Prompt tokens reported by the API."),
+            ("completion_tokens", "delphi_completion_tokens_total", "counter", "Completion tokens reported by the API."),
+            ("tokens_per_second", "delphi_tokens_per_second", "gauge", "Completion tokens per second of API time."),
+            ("budget_tokens", "delphi_budget_tokens_total", "counter", "Completion tokens reserved through max_tokens."),
+            ("budget_used", "delphi_budget_used_ratio", "gauge", "Completion tokens used per token reserved."),
+            ("continuations", "delphi_continuations_total", "counter", "Continuation requests for truncated answers."),
+            ("hedged_requests", "delphi_hedged_requests_total", "counter", "Duplicate requests sent for slow answers."),
+            ("time_to_first_token", "delphi_time_to_first_token_seconds", "gauge", "Streaming time to first token."),
+            ("prompt_eval_seconds", "delphi_prompt_eval_seconds", "gauge", "Server time spent evaluating the prompt."),
+            ("prompt_eval_tokens", "delphi_prompt_eval_tokens_total", "counter", "Prompt tokens the server evaluated."),
+            ("prompt_cached_tokens", "delphi_prompt_cached_tokens_total", "counter", "Prompt tokens reused from the server's cache.")
+        ]
+        for key, name, kind, help_text in counters:
+            samples = [(labels, e[key]) for labels, e in series if key in e]
+            if not samples:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f'{name}{{{labels}}} {v:g}' for labels, v in samples)
+        return "\n".join(lines) + "\n"
+    
+    def write(self, directory: Path, prefix: str) -> Tuple[Path, Path]:
+        """Write <prefix>_metrics.json and <prefix>_metrics.prom into directory."""
+        json_path = directory / f"{prefix}_metrics.json"
+        prom_path = directory / f"{prefix}_metrics.prom"
+        json_path.write_text(json.dumps(self.to_json(), indent=2), encoding="utf-8")
+        prom_path.write_text(self.to_prometheus(), encoding="utf-8")
+        return json_path, prom_path
+
+
+# Per-thread context: which character a worker is processing and where its metrics go
+_context = threading.local()
+
+
+@contextmanager
+def character_context(metrics: RunMetrics, character: str) -> Iterator[None]:
+    """Attribute work on this thread to a character until the block exits."""
+    previous = getattr(_context, "metrics", None), getattr(_context, "character", None)
+    _context.metrics, _context.character = metrics, character
+    try:
+        yield
+    finally:
+        _context.metrics, _context.character = previous
+
+
+@contextmanager
+def deadline_context(*deadlines: Optional[float]) -> Iterator[None]:
+    """Limit requests on this thread to the earliest of the given monotonic deadlines."""
+    previous = getattr(_context, "deadline", None)
+    candidates = [d for d in (previous,) + deadlines if d is not None]
+    _context.deadline = min(candidates) if candidates else None
+    try:
+        yield
+    finally:
+        _context.deadline = previous
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left before this thread's deadline, or None without one."""
+    deadline = getattr(_context, "deadline", None)
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def bind_context(func: Callable[..., T]) -> Callable[..., T]:
+    """Wrap func so it runs in the calling thread's character context and deadline on another thread."""
+    metrics, character = getattr(_context, "metrics", None), getattr(_context, "character", None)
+    deadline = getattr(_context, "deadline", None)
+    if (metrics is None or character is None) and deadline is None:
+        return func
+    
+    @wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> T:
+        with deadline_context(deadline):
+            if metrics is None or character is None:
+                return func(*args, **kwargs)
+            with character_context(metrics, character):
+                return func(*args, **kwargs)
+    return wrapper
+
+
+def record_metric(counter: str, amount: float = 1) -> None:
+    """Add to a counter for the character being processed on this thread."""
+    metrics, character = getattr(_context, "metrics", None), getattr(_context, "character", None)
+    if metrics is not None and character is not None:
+        metrics.add(character, counter, amount)
+
+
+@contextmanager
+def timed_stage(stage: str) -> Iterator[None]:
+    """Time a pipeline stage for the character being processed on this thread."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics, character = getattr(_context, "metrics", None), getattr(_context, "character", None)
+        if metrics is not None and character is not None:
+            metrics.add_time(character, stage, time.perf_counter() - start)
+
+
+class ResponseCache:
+    """Content-addressed on-disk cache of raw completions.
+    
+    Entries are keyed on a hash of the request payload and evicted when older
+    than `max_age` seconds or, least recently used first, once the cache holds
+    more than `max_bytes` or `max_entries`. The total size is tracked as
+    entries are written, so the directory is only scanned when a limit is
+    exceeded, and eviction then trims to LOW_WATER of the limits.
+    """
+    # Payload keys that change the transport but not the completion
+    TRANSPORT_KEYS = ("stream", "cache_prompt")
+    LOW_WATER = 0.9  # Fraction of the limits eviction trims down to
+    
+    def __init__(self, directory: Path, max_entries: int, max_age: float, max_bytes: int):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self._usage: Optional[Tuple[int, int]] = None  # (entries, bytes), counted on first write
+        self._lock = threading.Lock()
+    
+    def key(self, payload: JsonDict) -> str:
+        """Hash the parts of the payload that determine the completion."""
+        material = {k: v for k, v in payload.items() if k not in self.TRANSPORT_KEYS}
+        encoded = json.dumps(material, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+    
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+    
+    def _removed(self, size: int) -> None:
+        if self._usage is not None:
+            entries, total = self._usage
+            self._usage = (entries - 1, total - size)
+    
+    def get(self, key: str) -> Optional[JsonDict]:
+        """Return the cached entry for key, or None if absent or expired."""
+        path = self._path(key)
+        try:
+            stat = path.stat()
+            if time.time() - stat.st_mtime > self.max_age:
+                with self._lock:
+                    path.unlink()
+                    self._removed(stat.st_size)
+                return None
+            entry = json.loads(path.read_text(encoding="utf-8"))
+            os.utime(path)  # Mark as recently used
+            return entry
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning("Ignoring unreadable cache entry %s: %s", path, e)
+            return None
+    
+    def put(self, key: str, content: Union[str, List[str]], parsed: JsonDict) -> None:
+        """Store raw completion(s) and the parsed result, evicting old entries if over a limit."""
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            data = json.dumps({"created": time.time(), "content": content, "parsed": parsed}).encode("utf-8")
+            path = self._path(key)
+            tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(data)
+            with self._lock:
+                if self._usage is None:
+                    entries = self._entries()
+                    self._usage = (len(entries), sum(size for _, size, _ in entries))
+                try:
+                    replaced: Optional[int] = path.stat().st_size
+                except FileNotFoundError:
+                    replaced = None
+                tmp_path.replace(path)
+                count, total = self._usage
+                self._usage = (count + (replaced is None), total + len(data) - (replaced or 0))
+                over = self._usage[0] > self.max_entries or self._usage[1] > self.max_bytes
+            if over:
+                self.evict()
+        except Exception as e:
+            logger.warning("Failed to write cache entry %s: %s", key, e)
+    
+    def _entries(self) -> List[Tuple[float, int, Path]]:
+        """Unexpired entries as (mtime, size, path), deleting expired ones."""
+        now = time.time()
+        entries = []
+        for path in self.directory.glob("*.json"):
+            if len(path.stem) != 64:
+                continue  # Not an entry, e.g. the token budget
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if now - stat.st_mtime > self.max_age:
+                path.unlink(missing_ok=True)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+    
+    def evict(self) -> None:
+        """Drop expired entries, then least recently used ones until under LOW_WATER of the limits."""
+        with self._lock:
+            entries = sorted(self._entries())
+            count, total = len(entries), sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if count <= self.max_entries * self.LOW_WATER and total <= self.max_bytes * self.LOW_WATER:
+                    break
+                path.unlink(missing_ok=True)
+                count, total = count - 1, total - size
+            self._usage = (count, total)
+
+
+class RunJournal:
+    """Append-only JSONL journal of completed characters, fsync'd per entry."""
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+    
+    def load(self) -> Dict[str, JsonDict]:
+        """Return the results recorded so far, ignoring a torn final line."""
+        completed = {}
+        if not self.path.exists():
+            return completed
+        
+        text = self.path.read_text(encoding="utf-8")
+        if text and not text.endswith("\n"):
+            # Drop a partially written last entry so new appends start on a fresh line
+            text = text[:text.rfind("\n") + 1]
+            self.path.write_text(text, encoding="utf-8")
+            logger.warning("Discarded incomplete final entry in %s", self.path)
+        
+        for line_no, line in enumerate(text.splitlines(), 1):
+            try:
+                entry = json.loads(line)
+                completed[entry["character"]] = entry["result"]
+            except (ValueError, KeyError):
+                logger.warning("Skipping malformed journal line %s in %s", line_no, self.path)
+        return completed
+    
+    def completed(self) -> 'JsonlResults':
+        """Index the results recorded so far without loading them, dropping a torn final line."""
+        if self.path.exists() and self.path.stat().st_size:
+            with self.path.open("rb+") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.seek(0)
+                    end = 0
+                    for line in f:
+                        if line.endswith(b"\n"):
+                            end += len(line)
+                    f.truncate(end)
+                    logger.warning("Discarded incomplete final entry in %s", self.path)
+        return JsonlResults(self.path)
+    
+    def reset(self) -> None:
+        """Start a fresh journal."""
+        self.path.write_text("", encoding="utf-8")
+    
+    def record(self, character: str, result: JsonDict) -> None:
+        """Durably append a completed character's validated result."""
+        line = json.dumps({"character": character, "time": time.time(), "result": result})
+        with self._lock:
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+
+class JsonlResults(Mapping):
+    """Read-only mapping of character to result over a journal-format JSONL file.
+    
+    Only the byte offset of each entry is held in memory; results are read
+    from disk on access, so a completed round of any size can be fed to the
+    next one.
+    """
+    def __init__(self, path: Path):
+        self.path = path
+        self._offsets: Dict[str, int] = {}
+        if not path.exists():
+            return
+        with path.open("rb") as f:
+            offset = 0
+            for line in f:
+                try:
+                    self._offsets[json.loads(line)["character"]] = offset
+                except (ValueError, KeyError):
+                    pass
+                offset += len(line)
+    
+    def __getitem__(self, character: str) -> JsonDict:
+        offset = self._offsets[character]
+        with self.path.open("rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline())["result"]
+    
+    def __contains__(self, character: object) -> bool:
+        # Mapping's default would read the entry from disk
+        return character in self._offsets
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._offsets)
+    
+    def __len__(self) -> int:
+        return len(self._offsets)
+    
+    def stream(self) -> Iterator[Tuple[str, JsonDict]]:
+        """(character, result) pairs in file order, read sequentially."""
+        with self.path.open("rb") as f:
+            offset = 0
+            for line in f:
+                line_offset, offset = offset, offset + len(line)
+                try:
+                    entry = json.loads(line)
+                    character, result = entry["character"], entry["result"]
+                except (ValueError, KeyError):
+                    continue
+                # A character recorded twice is represented by its last entry
+                if self._offsets.get(character) == line_offset:
+                    yield character, result
+
+
+def merge_composite(results: JsonlResults, path: Path) -> None:
+    """Write results in the round{n}_responses.json layout, one entry at a time.
+    
+    The output is identical to json.dumps(dict(results), indent=2) without
+    ever holding more than one result in memory.
+    """
+    tmp_path = path.with_suffix(".json.tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        f.write("{")
+        for i, (character, result) in enumerate(results.stream()):
+            body = json.dumps(result, indent=2).replace("\n", "\n  ")
+            f.write(f'{"," if i else ""}\n  {json.dumps(character)}: {body}')
+        f.write("\n}" if len(results) else "}")
+    tmp_path.replace(path)
+
+
+@dataclass
+class Persona:
+    """A panel member; streamed panels carry the profile text with the name."""
+    name: str
+    profile: Optional[str] = None
+
+
+# Persona names become file names in the round and debug directories
+SAFE_NAME_RE = re.compile(r'[\w .-]+')
+
+
+def is_safe_name(name: str) -> bool:
+    """Whether a character name can be used as a file name without leaving its directory."""
+    return bool(SAFE_NAME_RE.fullmatch(name)) and ".." not in name and bool(name.strip(" ."))
+
+
+def iter_personas(source: Path) -> Iterator[Persona]:
+    """Lazily read personas from a directory of .txt profiles or a JSONL file.
+    
+    Personas whose names are not safe file names are skipped.
+    """
+    if source.is_dir():
+        with os.scandir(source) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(".txt"):
+                    path = Path(entry.path)
+                    if is_safe_name(path.stem):
+                        yield Persona(path.stem, load_file(path))
+                    else:
+                        logger.warning("Skipping persona with unsafe name %r in %s", path.stem, source)
+        return
+    
+    with source.open(encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                persona = Persona(str(entry["name"]), entry["profile"])
+            except (ValueError, KeyError, TypeError):
+                logger.warning("Skipping malformed persona line %s in %s", line_no, source)
+                continue
+            if is_safe_name(persona.name):
+                yield persona
+            else:
+                logger.warning("Skipping persona with unsafe name %r on line %s of %s",
+                               persona.name, line_no, source)
+
+
 def find_file(name: str, extensions: Optional[List[str]] = None, 
               locations: Optional[List[str]] = None) -> Optional[Path]:
     """Find a file by name, with optional extensions and locations."""
@@ -201,7 +1531,7 @@ def find_file(name: str, extensions: Optional[List[str]] = None,
             for ext in extensions:
                 path = location_path / f"{base_name}{ext}"
                 if path.exists():
-                    logger.info(f"Found file: {path}")
+                    logger.debug("Found file: %s", path)
                     return path
     
     return None
@@ -212,90 +1542,478 @@ def load_file(path: Path) -> Optional[str]:
     try:
         return path.read_text(encoding='utf-8').strip()
     except Exception as e:
-        logger.error(f"Error loading file {path}: {str(e)}")
+        logger.error("Error loading file %s: %s", path, e)
         return None
 
 
+class DebugWriter:
+    """Leveled debug-artifact writer that does its disk I/O on a background thread.
+    
+    Levels: "off" writes nothing, "failures" buffers a character's artifacts
+    in memory and only writes them if the character fails, "full" writes
+    everything. Files go to a per-run directory.
+    """
+    LEVELS = ("off", "failures", "full")
+    
+    def __init__(self, directory: Path, level: str = "failures", compress: bool = False):
+        if level not in self.LEVELS:
+            raise ValueError(f"Unknown debug level {level!r}, expected one of {self.LEVELS}")
+        self.directory = directory
+        self.level = level
+        self.compress = compress
+        self._pending: Dict[str, List[Tuple[str, str]]] = {}
+        self._lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self.written = 0  # Files written so far, only updated by the writer thread
+    
+    def save(self, character: str, content: str, suffix: str) -> None:
+        """Record an artifact according to the configured level."""
+        if self.level == "off":
+            return
+        if self.level == "full":
+            self._enqueue(character, suffix, content)
+            return
+        with self._lock:
+            self._pending.setdefault(character, []).append((suffix, content))
+    
+    def fail(self, character: str) -> None:
+        """Write out the artifacts buffered for a failed character."""
+        with self._lock:
+            artifacts = self._pending.pop(character, [])
+        for suffix, content in artifacts:
+            self._enqueue(character, suffix, content)
+    
+    def discard(self, character: str) -> None:
+        """Drop the artifacts buffered for a successful character."""
+        with self._lock:
+            self._pending.pop(character, None)
+    
+    def _enqueue(self, character: str, suffix: str, content: str) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="debug-writer", daemon=True)
+                self._thread.start()
+        self._queue.put((character, suffix, content))
+    
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._write(*item)
+            finally:
+                self._queue.task_done()
+    
+    def _write(self, character: str, suffix: str, content: str) -> None:
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            debug_path = self.directory / f"{character}_{suffix}.txt"
+            if self.compress:
+                with gzip.open(debug_path.with_name(debug_path.name + ".gz"), "wt", encoding="utf-8") as f:
+                    f.write(content)
+            else:
+                debug_path.write_text(content, encoding="utf-8")
+            self.written += 1
+            logger.debug("Saved debug file: %s", debug_path)
+        except Exception as e:
+            logger.error("Error saving debug file for %s: %s", character, e)
+    
+    def flush(self) -> None:
+        """Block until all queued artifacts are on disk."""
+        self._queue.join()
+    
+    def close(self) -> None:
+        """Flush and stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+
+def build_system_message(config: DelphiConfig) -> str:
+    """Build the static system message shared by every character."""
+    min_rating, max_rating = config.rating_range
+    min_conf, max_conf = config.confidence_range
+    return (
+        "You are participating in an ethical analysis of a difficult decision. "
+        "The scenario involves whether to revive (wake up) an ancient group of warriors "
+        "who have been in a special sleep for 900 years using advanced technology. "
+        "These warriors were once powerful and potentially dangerous. Respond as specified in "
+        "the character profile, considering the unique worldview, values, and decision-making style. "
+        "Analyze the dilemma from this perspective without explicitly stating \"As [Character]\" "
+        "or \"I am [Character].\" Your reasoning should authentically reflect the character's "
+        "thought patterns and values.\n\n"
+        "IMPORTANT: Your response MUST be properly formatted JSON with the following structure:\n"
+        + EXAMPLE_JSON + "\n"
+        "Your JSON must:\n"
+        f"1. Include {config.question_count} questions, numbered 1-{config.question_count}\n"
+        f"2. For each question, include a rating ({min_rating}-{max_rating}), position_summary, "
+        f"detailed_explanation, and confidence ({min_conf}-{max_conf})\n"
+        "3. Use only standard ASCII characters in your JSON (no fancy quotes or special characters)\n"
+        "4. Not include any text before or after the JSON object\n\n"
+        "Return only the JSON object and nothing else."
+    )
+
+
+def build_response_schema(config: DelphiConfig, questions: Optional[List[int]] = None) -> JsonDict:
+    """JSON schema for a complete answer, for servers that constrain decoding to it.
+    
+    Each question is pinned to its position, so the output has exactly
+    question_count answers (or just `questions`), in order, with ratings
+    and confidence in range.
+    """
+    questions = questions or list(range(1, config.question_count + 1))
+    min_rating, max_rating = config.rating_range
+    min_conf, max_conf = config.confidence_range
+    
+    def answer(number: int) -> JsonDict:
+        return {
+            "type": "object",
+            "properties": {
+                "question": {"type": "integer", "const": number},
+                "rating": {"type": "integer", "minimum": min_rating, "maximum": max_rating},
+                "position_summary": {"type": "string"},
+                "detailed_explanation": {"type": "string"},
+                "confidence": {"type": "integer", "minimum": min_conf, "maximum": max_conf}
+            },
+            "required": ["question", "rating", "position_summary", "detailed_explanation", "confidence"],
+            "additionalProperties": False
+        }
+    
+    return {
+        "type": "object",
+        "properties": {
+            "responses": {
+                "type": "array",
+                "prefixItems": [answer(i) for i in questions],
+                "minItems": len(questions),
+                "maxItems": len(questions)
+            }
+        },
+        "required": ["responses"],
+        "additionalProperties": False
+    }
+
+
+class PromptAssets:
+    """Profiles, questionnaire and system message, loaded once and kept in memory.
+    
+    Files are re-read only when their modification time changes, so a
+    long-lived process picks up edits without rescanning on every character.
+    Passing `shared` reuses another instance's file contents.
+    """
+    QUESTIONNAIRE_NAMES = ('initial-question', 'questionnaire')
+    
+    def __init__(self, config: DelphiConfig, shared: Optional['PromptAssets'] = None):
+        self.profile_dir = config.profile_dir
+        self.questionnaire_file = config.questionnaire
+        self.system_message = build_system_message(config)
+        self.response_schema = build_response_schema(config)
+        self._paths: Dict[str, Path] = {}
+        self._contents: Dict[Path, Tuple[float, str]] = shared._contents if shared else {}
+        self._questionnaire_path: Optional[Path] = None
+        self._lock = shared._lock if shared else threading.Lock()
+    
+    def load(self, characters: List[str]) -> List[str]:
+        """Index profiles and the questionnaire; return characters without a profile."""
+        paths = {path.stem: path for path in sorted(self.profile_dir.glob('*.txt'))}
+        # Names outside the profiles directory are resolved once, here
+        for character in characters:
+            if character not in paths:
+                path = find_file(character, extensions=['.txt'])
+                if path:
+                    paths[character] = path
+        
+        with self._lock:
+            self._paths = paths
+            self._questionnaire_path = self.questionnaire_file or next(
+                (path for path in (find_file(name, extensions=['.md']) 
+                                   for name in self.QUESTIONNAIRE_NAMES) if path),
+                None
+            )
+        
+        missing = [c for c in characters if c not in paths or self.profile(c) is None]
+        logger.info("Loaded %s profiles from %s", len(paths), self.profile_dir)
+        return missing
+    
+    def _read(self, path: Optional[Path]) -> Optional[str]:
+        """Return file content, reloading it if the file changed on disk."""
+        if path is None:
+            return None
+        try:
+            mtime = path.stat().st_mtime
+        except OSError as e:
+            logger.error("Error loading file %s: %s", path, e)
+            return None
+        
+        with self._lock:
+            cached = self._contents.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        
+        content = load_file(path)
+        if content:
+            with self._lock:
+                self._contents[path] = (mtime, content)
+        return content
+    
+    def profile(self, character: str) -> Optional[str]:
+        """The profile text for a character, or None if unavailable."""
+        return self._read(self._paths.get(character))
+    
+    def questionnaire(self) -> Optional[str]:
+        """The questionnaire text, or None if unavailable."""
+        return self._read(self._questionnaire_path)
+
+
 def save_debug_file(config: DelphiConfig, character: str, 
                     content: str, suffix: str = "raw") -> None:
     """Save content to a debug file for inspection."""
-    try:
-        debug_path = config.debug_dir / f"{character}_{suffix}.txt"
-        debug_path.write_text(content, encoding="utf-8")
-        logger.info(f"Saved debug file: {debug_path}")
-    except Exception as e:
-        logger.error(f"Error saving debug file for {character}: {str(e)}")
+    config.debug_writer.save(character, content, suffix)
+
+
+# Common problematic Unicode characters and their ASCII replacements
+UNICODE_REPLACEMENTS = {
+    '\u2026': '...',  # Ellipsis
+    '\u2013': '-',    # En dash
+    '\u2014': '--',   # Em dash
+    '\u2018': "'",    # Left single quote
+    '\u2019': "'",    # Right single quote
+    '\u201C': '"',    # Left double quote
+    '\u201D': '"',    # Right double quote
+    '\u00A0': ' ',    # Non-breaking space
+    '\u2022': '*',    # Bullet
+    '\u2212': '-',    # Minus sign
+}
+
+
+class AsciiFoldTable(dict):
+    """str.translate table that computes and memoizes ASCII folds on demand.
+    
+    Explicit replacements win; anything else is NFKD-decomposed and each
+    remaining non-ASCII code point (e.g. combining marks) becomes a space.
+    """
+    def __missing__(self, code_point: int) -> str:
+        decomposed = unicodedata.normalize('NFKD', chr(code_point))
+        folded = ''.join(c if ord(c) < 128 else ' ' for c in decomposed)
+        self[code_point] = folded
+        return folded
+
+
+ASCII_FOLD_TABLE = AsciiFoldTable(
+    {ord(char): replacement for char, replacement in UNICODE_REPLACEMENTS.items()}
+)
+
+# Above this many distinct non-ASCII characters, translate in a single pass
+MAX_REPLACE_PASSES = 32
 
 
 def normalize_text(text: str) -> str:
     """Normalize Unicode text to ASCII for JSON compatibility."""
-    # Define common problematic Unicode characters and their replacements
-    replacements = {
-        '\u2026': '...',  # Ellipsis
-        '\u2013': '-',    # En dash
-        '\u2014': '--',   # Em dash
-        '\u2018': "'",    # Left single quote
-        '\u2019': "'",    # Right single quote
-        '\u201C': '"',    # Left double quote
-        '\u201D': '"',    # Right double quote
-        '\u00A0': ' ',    # Non-breaking space
-        '\u2022': '*',    # Bullet
-        '\u2212': '-',    # Minus sign
-    }
+    # Already-normalized text (the common case) needs no work
+    if text.isascii():
+        return text
     
-    # First apply direct replacements
-    for char, replacement in replacements.items():
-        text = text.replace(char, replacement)
+    non_ascii = [char for char in set(text) if not char.isascii()]
+    if len(non_ascii) > MAX_REPLACE_PASSES:
+        return text.translate(ASCII_FOLD_TABLE)
     
-    # Then normalize and convert to ASCII
-    normalized = unicodedata.normalize('NFKD', text)
-    return ''.join(
-        char if ord(char) < 128 else 
-        unicodedata.normalize('NFKD', char).encode('ascii', 'ignore').decode('ascii') or ' '
-        for char in normalized
-    )
+    # A few distinct characters: one C-level replace pass each beats a
+    # per-character table lookup. Folds are pure ASCII, so order is irrelevant.
+    for char in non_ascii:
+        text = text.replace(char, ASCII_FOLD_TABLE[ord(char)])
+    return text
+
+
+def send_request(config: DelphiConfig, payload: JsonDict,
+                 cancel: Optional[threading.Event] = None) -> JsonDict:
+    """One request on the least loaded endpoint, bounded by the thread's deadline.
+    
+    Backend failures count towards ejecting the endpoint; the error is
+    marked for failover when another endpoint can take the retry.
+    """
+    client = config.client
+    timeout = client.timeout
+    remaining = remaining_time()
+    if remaining is not None:
+        if remaining <= 0:
+            raise DeadlineExceeded("Deadline reached before the request was sent")
+        timeout = (min(timeout[0], remaining), min(timeout[1], remaining))
+    
+    pool = client.endpoints
+    with pool.acquire() as endpoint:
+        logger.debug("Making API call to %s", endpoint.url)
+        started = time.monotonic()
+        try:
+            if payload.get("stream"):
+                result = client.stream_chat(endpoint, "/chat/completions", payload,
+                                            config.question_count, timeout, cancel)
+            else:
+                result = client.post_json(endpoint, "/chat/completions", payload, timeout)
+        except requests.Timeout as e:
+            remaining = remaining_time()
+            if remaining is not None and remaining <= 0:
+                raise DeadlineExceeded(f"Deadline reached waiting for {endpoint.url}") from e
+            if pool.failed(endpoint):
+                e.failover = True  # type: ignore[attr-defined]
+            raise
+        except Exception as e:
+            if is_backend_failure(e) and pool.failed(endpoint):
+                e.failover = True  # type: ignore[attr-defined]
+            raise
+    pool.succeeded(endpoint)
+    client.latencies.add(time.monotonic() - started)
+    return result
+
+
+def hedged_request(config: DelphiConfig, payload: JsonDict, threshold: float) -> JsonDict:
+    """Send a request, duplicating it if no answer arrives within threshold seconds.
+    
+    The duplicate is only sent once an endpoint has a free slot, so hedges
+    never queue behind (and slow down) first attempts. The first successful
+    answer wins and the other request is cancelled: streamed requests stop
+    on the server, while a non-streamed loser runs to completion in the
+    background and its answer is discarded.
+    """
+    client = config.client
+    send = bind_context(send_request)
+    
+    def within_deadline(timeout: float) -> float:
+        remaining = remaining_time()
+        return timeout if remaining is None else max(0.0, min(timeout, remaining))
+    
+    def deadline_passed() -> bool:
+        remaining = remaining_time()
+        return remaining is not None and remaining <= 0
+    
+    cancels = [threading.Event()]
+    futures = {client.hedge_executor.submit(send, config, payload, cancels[0]): 0}
+    done, _ = wait(futures, timeout=within_deadline(threshold))
+    while not done and not deadline_passed() and not client.endpoints.has_capacity():
+        done, _ = wait(futures, timeout=within_deadline(threshold / 4))
+    if not done and not deadline_passed():
+        logger.debug("No answer after %.1fs (p%g latency), sending a hedged request",
+                    threshold, config.hedge_percentile)
+        config.stats.incr("hedged_requests")
+        record_metric("hedged_requests")
+        cancels.append(threading.Event())
+        futures[client.hedge_executor.submit(send, config, payload, cancels[1])] = 1
+    
+    error: Optional[Exception] = None
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, timeout=remaining_time(), return_when=FIRST_COMPLETED)
+        if not done:
+            for cancel in cancels:
+                cancel.set()
+            raise DeadlineExceeded("Deadline reached waiting for hedged requests")
+        for future in done:
+            try:
+                result = future.result()
+            except Exception as e:
+                error = error or e
+                continue
+            for cancel in cancels:
+                cancel.set()
+            if futures[future] == 1:
+                config.stats.incr("hedges_won")
+            return result
+    raise cast(Exception, error)
 
 
 @retry(max_retries=3)  # Will use the config's value when called
 def call_api(config: DelphiConfig, payload: JsonDict) -> JsonDict:
-    """Make API call with retry logic."""
-    url = f"{config.base_url}/chat/completions"
-    headers = {"Content-Type": "application/json"}
-    
-    logger.info("Making API call")
-    response = requests.post(
-        url, 
-        json=payload, 
-        headers=headers, 
-        timeout=config.api_timeout
-    )
+    """Make API call with retry logic on the least loaded endpoint.
     
-    if response.status_code != 200:
-        raise Exception(f"API Error {response.status_code}: {response.text}")
+    When another endpoint is available a failed request is retried there
+    without backing off. With config.hedge_percentile set, a request still
+    unanswered at that percentile of recent latencies is sent again and
+    the first answer wins.
+    """
+    if config.hedge_percentile > 0 and config.client.hedge_executor is not None:
+        threshold = config.client.latencies.percentile(config.hedge_percentile,
+                                                       config.hedge_min_samples)
+        if threshold is not None:
+            return hedged_request(config, payload, threshold)
+    return send_request(config, payload)
+
+
+# Characters that matter for brace matching; everything else is skipped in C
+JSON_STRUCTURE_RE = re.compile(r'[{}"\\]')
+
+
+def iter_json_objects(text: str) -> Iterator[str]:
+    """Yield balanced top-level {...} objects from text in a single linear pass.
     
-    return response.json()
+    Quotes are only tracked inside objects, so apostrophes and quotes in
+    surrounding prose do not confuse the scan. An unterminated trailing
+    object is not yielded.
+    """
+    depth = 0
+    start = 0
+    in_string = False
+    escaped_pos = -1
+    for match in JSON_STRUCTURE_RE.finditer(text):
+        pos = match.start()
+        if pos == escaped_pos:
+            continue
+        char = match.group()
+        if depth == 0:
+            if char == '{':
+                depth = 1
+                start = pos
+        elif in_string:
+            if char == '\\':
+                escaped_pos = pos + 1
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                yield text[start:pos + 1]
 
 
 def extract_json_blocks(text: str) -> List[str]:
     """Extract potential JSON blocks from text."""
-    # Try to find JSON in code blocks
+    # Prefer balanced objects that mention the responses key
+    json_blocks = [block for block in iter_json_objects(text) if "responses" in block]
+    if json_blocks:
+        return json_blocks
+    
+    # Then try code blocks, which may hold lenient (hjson) content
     code_blocks = re.findall(r'```(?:json)?(.*?)```', text, re.DOTALL)
     if code_blocks:
         return code_blocks
     
-    # Then look for JSON-like objects starting with { and containing "responses"
-    json_blocks = re.findall(r'(\{.*"responses".*\})', text, re.DOTALL)
-    if json_blocks:
-        return json_blocks
-    
     # If we can't find a clearly defined JSON block, return the whole text
     return [text]
 
 
-def validate_response(config: DelphiConfig, i: int, response: JsonDict) -> JsonDict:
-    """Validate and normalize a single response."""
+# Parsers in the order they are tried: the C-accelerated strict parser first,
+# then the lenient pure-Python one for near-JSON output
+JSON_PARSERS: List[Tuple[str, Callable[[str], JsonDict]]] = [
+    ("standard_json", json.loads),
+    ("hjson", hjson.loads)
+]
+
+
+def validate_response(config: DelphiConfig, i: int, response: JsonDict,
+                      defects: Optional[List[int]] = None) -> JsonDict:
+    """Validate and normalize a single response.
+    
+    If anything had to be defaulted or clamped, the question number is
+    appended to `defects`.
+    """
     # Start with a copy of the response to avoid modifying the original
     resp = response.copy()
+    defective = False
     
     # Set correct question number
     resp["question"] = i + 1
@@ -304,66 +2022,98 @@ def validate_response(config: DelphiConfig, i: int, response: JsonDict) -> JsonD
     min_rating, max_rating = config.rating_range
     if "rating" not in resp or not isinstance(resp["rating"], (int, float)):
         resp["rating"] = Rating.NEUTRAL.value
-        logger.warning(f"Missing or invalid rating for question {i+1}, setting to neutral (4)")
+        defective = True
+        logger.warning("Missing or invalid rating for question %s, setting to neutral (4)", i+1)
     else:
         orig_rating = resp["rating"]
         resp["rating"] = max(min_rating, min(max_rating, int(resp["rating"])))
         if resp["rating"] != orig_rating:
-            logger.warning(f"Rating out of range ({orig_rating}) for question {i+1}, clamped to {resp['rating']}")
+            defective = True
+            logger.warning("Rating out of range (%s) for question %s, clamped to %s",
+                           orig_rating, i+1, resp['rating'])
     
     # Validate confidence
     min_conf, max_conf = config.confidence_range
     if "confidence" not in resp or not isinstance(resp["confidence"], (int, float)):
         resp["confidence"] = Confidence.MODERATE.value
-        logger.warning(f"Missing or invalid confidence for question {i+1}, setting to moderate (3)")
+        defective = True
+        logger.warning("Missing or invalid confidence for question %s, setting to moderate (3)",
+                       i+1)
     else:
         orig_conf = resp["confidence"]
         resp["confidence"] = max(min_conf, min(max_conf, int(resp["confidence"])))
         if resp["confidence"] != orig_conf:
-            logger.warning(f"Confidence out of range ({orig_conf}) for question {i+1}, clamped to {resp['confidence']}")
+            defective = True
+            logger.warning("Confidence out of range (%s) for question %s, clamped to %s",
+                           orig_conf, i+1, resp['confidence'])
     
     # Validate and normalize text fields
     for field in ["position_summary", "detailed_explanation"]:
-        if field not in resp:
+        if not isinstance(resp.get(field), str) or not resp[field].strip():
             resp[field] = f"No {field.replace('_', ' ')} for question {i+1}"
-            logger.warning(f"Missing {field} for question {i+1}")
+            defective = True
+            logger.warning("Missing %s for question %s", field, i+1)
         else:
             resp[field] = normalize_text(resp[field])
     
+    if defective and defects is not None:
+        defects.append(i + 1)
     return resp
 
 
+def missing_response(q_num: int) -> JsonDict:
+    """Neutral placeholder for a question the model did not answer."""
+    return {
+        "question": q_num,
+        "rating": Rating.NEUTRAL.value,  # Default neutral
+        "position_summary": f"Missing response for question {q_num}",
+        "detailed_explanation": f"No response provided for question {q_num}",
+        "confidence": Confidence.MODERATE.value  # Default moderate confidence
+    }
+
+
 def validate_and_cleanup_structure(config: DelphiConfig, parsed: JsonDict) -> JsonDict:
-    """Validate and clean up the parsed JSON structure."""
+    """Validate and clean up the parsed JSON structure.
+    
+    Questions that had to be filled in or fixed are listed under "defects"
+    so that they can be repaired.
+    """
     result = parsed.copy()
+    defects: List[int] = []
     
     # Ensure responses array exists
-    if "responses" not in result:
+    if not isinstance(result.get("responses"), list):
         logger.warning("'responses' field missing, adding default structure")
         result["responses"] = []
+    responses = [r if isinstance(r, dict) else None for r in result["responses"]]
     
-    # Ensure we have the right number of responses - fill missing or trim extra
-    while len(result["responses"]) < config.question_count:
-        q_num = len(result["responses"]) + 1
-        logger.warning(f"Missing response for question {q_num}, adding default")
-        result["responses"].append({
-            "question": q_num,
-            "rating": Rating.NEUTRAL.value,  # Default neutral
-            "position_summary": f"Missing response for question {q_num}",
-            "detailed_explanation": f"No response provided for question {q_num}",
-            "confidence": Confidence.MODERATE.value  # Default moderate confidence
-        })
+    if len(responses) > config.question_count:
+        logger.warning("Too many responses (%s), trimming to %s",
+                       len(responses), config.question_count)
     
-    if len(result["responses"]) > config.question_count:
-        logger.warning(f"Too many responses ({len(result['responses'])}), trimming to {config.question_count}")
-        result["responses"] = result["responses"][:config.question_count]
+    # Place answers by their own question numbers when those are consistent,
+    # so a skipped question leaves a gap instead of shifting the rest
+    numbers = [r.get("question") if r else None for r in responses]
+    if (all(isinstance(n, int) and 1 <= n <= config.question_count for n in numbers)
+            and len(set(numbers)) == len(numbers)):
+        by_number = dict(zip(numbers, responses))
+        responses = [by_number.get(q) for q in range(1, config.question_count + 1)]
+    else:
+        responses = (responses + [None] * config.question_count)[:config.question_count]
     
-    # Validate and normalize each response
-    validate = partial(validate_response, config)
-    result["responses"] = [
-        validate(i, resp) for i, resp in enumerate(result["responses"])
-    ]
+    # Fill missing answers and validate and normalize each response
+    validate = partial(validate_response, config, defects=defects)
+    for i, resp in enumerate(responses):
+        if resp is None:
+            logger.warning("Missing response for question %s, adding default", i + 1)
+            responses[i] = missing_response(i + 1)
+            defects.append(i + 1)
+        else:
+            responses[i] = validate(i, resp)
+    result["responses"] = responses
     
+    if defects:
+        result["defects"] = sorted(defects)
     return result
 
 
@@ -374,24 +2124,61 @@ def try_parse_json(config: DelphiConfig, block: str, character: str,
     try:
         parsed = parser(block)
         if "responses" in parsed:
-            logger.info(f"Successfully parsed JSON using {parser_name}")
+            logger.debug("Successfully parsed JSON using %s", parser_name)
             save_debug_file(
                 config, 
                 character, 
                 json.dumps(parsed, indent=2), 
                 f"parsed_{parser_name}"
             )
-            return validate_and_cleanup_structure(config, parsed)
+            with timed_stage("validate"):
+                return validate_and_cleanup_structure(config, parsed)
     except Exception as e:
-        logger.warning(f"{parser_name} parsing failed: {str(e)}")
+        logger.debug("%s parsing failed: %s", parser_name, e)
     return None
 
 
+def parse_constrained(config: DelphiConfig, text: str) -> Optional[JsonDict]:
+    """Fast path for schema-constrained output: a single json.loads, then the usual validation.
+    
+    Returns None if the text is not an object with a responses list (e.g.
+    the server ignored the schema), so the caller can fall back to tolerant
+    parsing. Blank or out-of-range answers are listed under "defects" as
+    for any other parser.
+    """
+    try:
+        parsed = json.loads(text)
+    except ValueError:
+        return None
+    if not isinstance(parsed, dict) or not isinstance(parsed.get("responses"), list):
+        return None
+    with timed_stage("validate"):
+        return validate_and_cleanup_structure(config, parsed)
+
+
 def extract_json(config: DelphiConfig, text: str, character: str) -> JsonDict:
-    """Extract and parse JSON from text using multiple methods."""
+    """Extract and parse JSON from text using multiple methods.
+    
+    When nothing can be parsed, placeholder answers are returned with
+    "fallback" set, so the completion is not cached.
+    """
     # Save the original response for debugging
     save_debug_file(config, character, text, "raw_response")
     
+    if config.constrained:
+        parsed = parse_constrained(config, text)
+        if parsed is not None and not parsed.get("defects"):
+            config.stats.incr("parsed_strict")
+            return parsed
+        if parsed is not None:
+            # Valid JSON that fails validation is not a strict parse; its defects go to repair
+            logger.warning("Constrained response for %s failed validation for question(s) %s",
+                           character, parsed["defects"])
+            config.stats.incr("parsed_standard_json")
+            return parsed
+        logger.warning("Constrained response for %s does not match the schema, "
+                       "falling back to tolerant parsing", character)
+    
     try:
         # First normalize the text to handle special Unicode characters
         text = normalize_text(text)
@@ -400,21 +2187,18 @@ def extract_json(config: DelphiConfig, text: str, character: str) -> JsonDict:
         # Extract potential JSON blocks
         json_blocks = extract_json_blocks(text)
         
-        # Define parsers with partial application
-        parsers = [
-            ("hjson", hjson.loads), 
-            ("standard_json", json.loads)
-        ]
-        
         # Try each block with each parser until one succeeds
         for block in json_blocks:
-            for parser_name, parser_func in parsers:
+            for parser_name, parser_func in JSON_PARSERS:
                 result = try_parse_json(config, block, character, parser_func, parser_name)
                 if result:
+                    config.stats.incr(f"parsed_{parser_name}")
                     return result
         
+        config.stats.incr("parse_fallbacks")
+        
         # If all parsing attempts fail, use a fallback structure
-        logger.warning(f"Failed to parse JSON for {character}, using fallback structure")
+        logger.warning("Failed to parse JSON for %s, using fallback structure", character)
         
         # Create a default response for each question
         default_responses = [
@@ -428,16 +2212,19 @@ def extract_json(config: DelphiConfig, text: str, character: str) -> JsonDict:
             for i in range(config.question_count)
         ]
         
-        fallback = {"responses": default_responses}
+        fallback = {"responses": default_responses, "defects": list(range(1, config.question_count + 1)),
+                    "fallback": True}
         
         save_debug_file(config, character, json.dumps(fallback, indent=2), "fallback_json")
+        config.debug_writer.fail(character)
         return fallback
         
     except Exception as e:
-        logger.error(f"Error in extract_json for {character}: {str(e)}")
+        logger.error("Error in extract_json for %s: %s", character, e)
         
         # Return minimal valid structure as fallback
-        logger.info(f"Using emergency fallback response structure for {character}")
+        logger.info("Using emergency fallback response structure for %s", character)
+        config.debug_writer.fail(character)
         
         # Create error responses for each question
         error_responses = [
@@ -451,15 +2238,17 @@ def extract_json(config: DelphiConfig, text: str, character: str) -> JsonDict:
             for i in range(config.question_count)
         ]
         
-        return {"responses": error_responses}
+        return {"responses": error_responses, "defects": list(range(1, config.question_count + 1)),
+                "fallback": True}
 
 
-def format_markdown(character: str, data: JsonDict) -> str:
+def format_markdown(character: str, data: JsonDict, round_number: int = 1) -> str:
     """Convert JSON response to markdown format."""
     character_name = character.replace("-", " ").title()
+    round_label = f" (Round {round_number})" if round_number > 1 else ""
     
     # Start with the title
-    markdown_parts = [f"# {character_name}'s Response to the Dragon's Teeth Dilemma\n"]
+    markdown_parts = [f"# {character_name}'s Response to the Dragon's Teeth Dilemma{round_label}\n"]
     
     # Generate markdown for each response
     for response in data["responses"]:
@@ -495,189 +2284,1068 @@ def format_markdown(character: str, data: JsonDict) -> str:
 
 
 def save_response(config: DelphiConfig, character: str, 
-                 data: JsonDict, markdown: str) -> bool:
+                 data: JsonDict, markdown: str, 
+                 output_dir: Optional[Path] = None, save_json: bool = True) -> bool:
     """Save response as both JSON and Markdown using pathlib."""
+    output_dir = output_dir or config.output_dir
     try:
         # Define file paths
-        json_path = config.output_dir / f"{character}.json"
-        md_path = config.output_dir / f"{character}.md"
+        json_path = output_dir / f"{character}.json"
+        md_path = output_dir / f"{character}.md"
         
         # Write files using pathlib methods
-        json_path.write_text(
-            json.dumps(data, indent=2), 
-            encoding="utf-8"
-        )
+        if save_json:
+            json_path.write_text(
+                json.dumps(data, indent=2), 
+                encoding="utf-8"
+            )
         
         md_path.write_text(
             markdown, 
             encoding="utf-8"
         )
         
-        logger.info(f"Saved response for {character}")
+        logger.debug("Saved response for %s", character)
         return True
     except Exception as e:
-        logger.error(f"Error saving response for {character}: {str(e)}")
+        logger.error("Error saving response for %s: %s", character, e)
         return False
 
 
-def generate_character_response(config: DelphiConfig, character: str) -> Optional[JsonDict]:
-    """Generate response from a character."""
-    # Load character profile
-    profile_path = find_file(character, extensions=['.txt'])
-    if not profile_path:
-        logger.error(f"No profile found for {character}")
-        return None
+@dataclass
+class DelphiRound:
+    """One round of the Delphi process: where its results go and what it is shown."""
+    number: int
+    output_dir: Path
+    composite_json: Path
+    journal_file: Path
+    feedback: Optional[str] = None  # Anonymized panel feedback from the previous round
+    previous: Mapping = field(default_factory=dict)  # Prior responses by character
+    deadline: Optional[float] = None  # Monotonic time by which the round's requests must finish
     
-    profile = load_file(profile_path)
-    if not profile:
-        return None
+    @classmethod
+    def create(cls, config: DelphiConfig, number: int,
+               previous: Optional[Mapping] = None) -> 'DelphiRound':
+        """Build a round, deriving its feedback block from the previous round's results."""
+        if number == 1:
+            return cls(1, config.output_dir, config.composite_json, config.journal_file)
+        
+        output_dir, composite_json = cls.paths(config, number)
+        output_dir.mkdir(exist_ok=True)
+        return cls(
+            number=number,
+            output_dir=output_dir,
+            composite_json=composite_json,
+            journal_file=Path(f"round{number}_journal.jsonl"),
+            feedback=build_round_feedback(config, number - 1, previous or {}),
+            previous=previous or {}
+        )
     
-    # Load questionnaire
-    questionnaire_path = find_file('initial-question', extensions=['.md']) or \
-                        find_file('questionnaire', extensions=['.md'])
-    if not questionnaire_path:
-        logger.error("Questionnaire not found")
+    @staticmethod
+    def paths(config: DelphiConfig, number: int) -> Tuple[Path, Path]:
+        """The output directory and composite JSON name of round `number`."""
+        if number == 1:
+            return config.output_dir, config.composite_json
+        return config.output_dir.parent / f"delphi_round{number}", Path(f"round{number}_responses.json")
+
+
+ROUND_INSTRUCTIONS = (
+    "This is round {number} of the Delphi process. Above is the anonymized feedback "
+    "from the previous round and your own previous answers. Reconsider each question "
+    "in light of the panel's views; you may keep or revise your ratings. Respond in "
+    "exactly the same JSON format as before."
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for English text (about four characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def summarize_questions(config: DelphiConfig, responses: Mapping) -> List[JsonDict]:
+    """Rating distribution, median, spread and representative summaries for each question.
+    
+    Works in a single pass over the responses (read sequentially for JSONL
+    results), keeping only the ratings and the first and last answer seen
+    for each rating value per question, so it is cheap for large panels.
+    """
+    questions = range(1, config.question_count + 1)
+    ratings: Dict[int, List[int]] = {q: [] for q in questions}
+    confidence_totals: Counter = Counter()
+    first_by_rating: Dict[int, Dict[int, Tuple[int, JsonDict]]] = {q: {} for q in questions}
+    last_by_rating: Dict[int, Dict[int, JsonDict]] = {q: {} for q in questions}
+    entries = responses.stream() if isinstance(responses, JsonlResults) else responses.items()
+    for _, data in entries:
+        for r in data.get("responses", []):
+            question = r.get("question")
+            if question not in ratings:
+                continue
+            first_by_rating[question].setdefault(r["rating"], (len(ratings[question]), r))
+            last_by_rating[question][r["rating"]] = r
+            ratings[question].append(r["rating"])
+            confidence_totals[question] += r["confidence"]
+    
+    min_rating, max_rating = config.rating_range
+    summaries = []
+    for question in questions:
+        question_ratings = sorted(ratings[question])
+        summary = {
+            "question": question,
+            "count": len(question_ratings),
+            "distribution": {v: question_ratings.count(v) for v in range(min_rating, max_rating + 1)},
+            "median": statistics.median(question_ratings) if question_ratings else None,
+            "quartiles": (statistics.quantiles(question_ratings, n=4, method='inclusive')[::2]
+                          if len(question_ratings) > 1 else (question_ratings * 2 or [None, None])),
+            "mean_confidence": (confidence_totals[question] / len(question_ratings)
+                                if question_ratings else None),
+            "summaries": []
+        }
+        summaries.append(summary)
+        if not question_ratings:
+            continue
+        
+        # Representative views: closest to the median (earliest on ties), then the two extremes
+        firsts = first_by_rating[question]
+        candidates = [
+            min(firsts.values(), key=lambda e: (abs(e[1]["rating"] - summary["median"]), e[0]))[1],
+            firsts[question_ratings[0]][1],
+            last_by_rating[question][question_ratings[-1]]
+        ]
+        chosen: List[JsonDict] = []
+        for answer in candidates:
+            if answer not in chosen and len(chosen) < config.feedback_summaries:
+                chosen.append(answer)
+        summary["summaries"] = [
+            (a["rating"], textwrap.shorten(a["position_summary"], config.feedback_summary_chars, 
+                                           placeholder="..."))
+            for a in chosen
+        ]
+    return summaries
+
+
+def build_round_feedback(config: DelphiConfig, round_number: int, responses: Mapping) -> str:
+    """Compact, anonymized feedback block describing a completed round.
+    
+    Its size depends on the question count and summary limits, not on the
+    number of panelists, so later-round prompts stay flat as the panel grows.
+    """
+    lines = [f"## Panel Feedback from Round {round_number} (anonymized, {len(responses)} panelists)"]
+    for s in summarize_questions(config, responses):
+        question = s["question"]
+        if not s["count"]:
+            lines.append(f"\nQ{question}: no responses")
+            continue
+        distribution = " ".join(f"{v}:{n}" for v, n in s["distribution"].items())
+        low, high = s["quartiles"]
+        lines.append(
+            f"\nQ{question}: ratings {distribution} | median {s['median']:g} | "
+            f"IQR {low:g}-{high:g} | mean confidence {s['mean_confidence']:.1f}"
+        )
+        lines.extend(f'- (rating {rating}) "{text}"' for rating, text in s["summaries"])
+    return "\n".join(lines)
+
+
+def format_previous_answers(config: DelphiConfig, data: JsonDict) -> str:
+    """A panelist's own answers from the previous round, in compact form."""
+    lines = ["## Your Previous Answers"]
+    for r in data.get("responses", []):
+        summary = textwrap.shorten(r["position_summary"], config.feedback_summary_chars, 
+                                   placeholder="...")
+        lines.append(f"Q{r['question']}: rating {r['rating']}, confidence {r['confidence']} - {summary}")
+    return "\n".join(lines)
+
+
+def format_related_arguments(config: DelphiConfig, character: str, previous: JsonDict,
+                             round_spec: DelphiRound) -> str:
+    """Other panelists' previous-round arguments in this run closest to the panelist's own, per question."""
+    lines = ["## Related Arguments from Other Panelists"]
+    for r in previous.get("responses", []):
+        try:
+            hits = config.vectors.search(r["position_summary"], config.retrieved_arguments,
+                                         question=r["question"], exclude_character=character,
+                                         round_number=round_spec.number - 1, run_id=config.run_id)
+        except Exception as e:
+            logger.error("Error searching vector index for %s: %s", character, e)
+            hits = []
+        for hit in hits:
+            text = textwrap.shorten(hit["text"], config.feedback_summary_chars, placeholder="...")
+            lines.append(f"Q{r['question']}: {text}")
+    return "\n".join(lines) if len(lines) > 1 else ""
+
+
+def build_user_message(config: DelphiConfig, character: str, profile: str, 
+                       questionnaire: str, round_spec: Optional[DelphiRound] = None) -> str:
+    """The per-character user message, with round feedback after round one.
+    
+    With the shared-prefix layout everything common to the round (the
+    questionnaire and panel feedback) comes first and the persona last, so
+    the server only has to prefill the per-character tail of each prompt.
+    """
+    later_round = round_spec is not None and round_spec.number > 1
+    if config.prompt_layout == "shared-prefix":
+        parts = [questionnaire]
+        if later_round:
+            parts.append(round_spec.feedback or "")
+        parts.append(f"## Your Character Profile\n\n{profile}")
+    else:
+        parts = [profile, questionnaire]
+        if later_round:
+            parts.append(round_spec.feedback or "")
+    
+    if later_round:
+        # A single lookup: for JSONL results each one is a read from disk
+        previous = round_spec.previous.get(character)
+        if previous is not None:
+            parts.append(format_previous_answers(config, previous))
+            if config.retrieved_arguments and config.vectors is not None:
+                related = format_related_arguments(config, character, previous, round_spec)
+                if related:
+                    parts.append(related)
+        parts.append(ROUND_INSTRUCTIONS.format(number=round_spec.number))
+    return "\n\n".join(parts)
+
+
+def record_usage(config: DelphiConfig, result: JsonDict) -> None:
+    """Add the token usage reported by the API to the run statistics."""
+    usage = result.get("usage") or {}
+    if usage.get("estimated"):
+        config.stats.incr("estimated_completion_tokens", usage.get("completion_tokens", 0))
+    config.stats.incr("prompt_tokens", usage.get("prompt_tokens", 0))
+    config.stats.incr("completion_tokens", usage.get("completion_tokens", 0))
+    record_metric("prompt_tokens", usage.get("prompt_tokens", 0))
+    record_metric("completion_tokens", usage.get("completion_tokens", 0))
+    
+    ttft = (result.get("stream_stats") or {}).get("time_to_first_token")
+    if ttft is not None:
+        record_metric("time_to_first_token", ttft)
+    
+    # llama.cpp reports how much of the prompt it actually evaluated (the rest came from its cache)
+    timings = result.get("timings") or {}
+    if "prompt_ms" in timings:
+        evaluated = timings.get("prompt_n", 0)
+        config.stats.incr("prompt_eval_ms", timings["prompt_ms"])
+        config.stats.incr("prompt_eval_tokens", evaluated)
+        record_metric("prompt_eval_seconds", timings["prompt_ms"] / 1000)
+        record_metric("prompt_eval_tokens", evaluated)
+        if usage.get("prompt_tokens"):
+            record_metric("prompt_cached_tokens", max(0, usage["prompt_tokens"] - evaluated))
+
+
+def request_samples(config: DelphiConfig, character: str, payload: JsonDict) -> List[str]:
+    """Request config.samples completions of one prompt.
+    
+    All samples are asked for in a single batched request (`n`), so the
+    prompt is only prefilled once. Servers that return fewer choices are
+    topped up with parallel single requests for the same prompt. Samples
+    cut off at max_tokens are continued.
+    """
+    result = call_api(config, payload)
+    record_usage(config, result)
+    choices = result["choices"][:config.samples]
+    
+    missing = config.samples - len(choices)
+    if missing > 0:
+        logger.debug("Server returned %s of %s samples, requesting %s more in parallel",
+                    len(choices), config.samples, missing)
+        single = {k: v for k, v in payload.items() if k != "n"}
+        with ThreadPoolExecutor(max_workers=missing, thread_name_prefix="delphi-sample") as executor:
+            request = bind_context(lambda _: call_api(config, single))
+            for result in executor.map(request, range(missing)):
+                record_usage(config, result)
+                choices.append(result["choices"][0])
+    
+    contents = []
+    for choice in choices:
+        # Usage covers the whole batch, so sample lengths are estimated
+        content = choice["message"]["content"]
+        completion_tokens = estimate_tokens(content)
+        if choice.get("finish_reason") == "length":
+            content, completion_tokens = continue_truncated(config, character, payload, content,
+                                                            completion_tokens)
+        config.budget.observe(character, completion_tokens)
+        contents.append(content)
+    return contents
+
+
+def aggregate_samples(config: DelphiConfig, samples: List[JsonDict]) -> JsonDict:
+    """Combine parsed samples into one response per question.
+    
+    The rating is the (low) median across samples and the confidence the
+    rounded mean; the text comes from the sample whose rating is closest to
+    the aggregate. Individual samples are kept under "samples".
+    """
+    aggregated = []
+    for i in range(config.question_count):
+        answers = [sample["responses"][i] for sample in samples]
+        rating = statistics.median_low(a["rating"] for a in answers)
+        representative = min(answers, key=lambda a: abs(a["rating"] - rating))
+        aggregated.append({
+            **representative,
+            "rating": rating,
+            "confidence": round(statistics.mean(a["confidence"] for a in answers)),
+            "rating_spread": max(a["rating"] for a in answers) - min(a["rating"] for a in answers)
+        })
+    return {"responses": aggregated, "samples": samples}
+
+
+REPAIR_INSTRUCTIONS = (
+    "Your answer for question(s) {questions} was missing or invalid. Respond with a JSON "
+    "object in the same format containing only those questions, each with a rating "
+    "({min_rating}-{max_rating}), position_summary, detailed_explanation and confidence "
+    "({min_conf}-{max_conf}). Return only the JSON object."
+)
+REPAIR_MIN_TOKENS = 256
+
+CONTINUE_INSTRUCTIONS = (
+    "Your reply was cut off. Continue it exactly where it stopped, without repeating "
+    "anything already written and without any commentary."
+)
+CONTINUATION_MIN_TOKENS = 256
+
+
+def continue_truncated(config: DelphiConfig, character: str, payload: JsonDict,
+                       content: str, completion_tokens: int) -> Tuple[str, int]:
+    """Extend a completion cut off at max_tokens; returns the text and its total tokens.
+    
+    Each continuation request shows the model its partial reply and appends
+    what comes back, so the tokens already generated are not paid for again.
+    """
+    for attempt in range(1, config.continuation_attempts + 1):
+        logger.info("Response for %s was cut off after %s tokens, "
+                    "requesting continuation (attempt %s)", character, completion_tokens, attempt)
+        config.stats.incr("continuations")
+        record_metric("continuations")
+        continuation = {k: v for k, v in payload.items() if k not in ("n", "response_format")}
+        continuation.update(
+            messages=payload["messages"] + [
+                {"role": "assistant", "content": content},
+                {"role": "user", "content": CONTINUE_INSTRUCTIONS}
+            ],
+            max_tokens=max(CONTINUATION_MIN_TOKENS, payload["max_tokens"] // 2),
+            stream=False
+        )
+        try:
+            with timed_stage("continuation"):
+                result = call_api(config, continuation)
+        except Exception as e:
+            logger.error("Error requesting continuation for %s: %s", character, e)
+            break
+        record_usage(config, result)
+        choice = result["choices"][0]
+        text = choice["message"]["content"]
+        # Drop a code fence the model may open again for the continuation
+        if text.lstrip().startswith("```"):
+            text = text.lstrip().split("\n", 1)[-1]
+        content += text
+        completion_tokens += (result.get("usage") or {}).get("completion_tokens") or estimate_tokens(text)
+        if choice.get("finish_reason") != "length":
+            break
+    else:
+        logger.warning("Response for %s still cut off after %s continuation(s)",
+                       character, config.continuation_attempts)
+    return content, completion_tokens
+
+
+def parse_repair(config: DelphiConfig, text: str, questions: List[int]) -> Dict[int, JsonDict]:
+    """Valid answers to the requested questions found in a repair completion."""
+    for block in extract_json_blocks(normalize_text(text)):
+        for _, parser_func in JSON_PARSERS:
+            try:
+                parsed = parser_func(block)
+            except Exception:
+                continue
+            responses = parsed.get("responses") if isinstance(parsed, dict) else parsed
+            if not isinstance(responses, list):
+                continue
+            answers = {}
+            for resp in responses:
+                number = resp.get("question") if isinstance(resp, dict) else None
+                if number not in questions:
+                    continue
+                defects: List[int] = []
+                answer = validate_response(config, number - 1, resp, defects)
+                if not defects:
+                    answers[number] = answer
+            return answers
+    return {}
+
+
+def request_repair(config: DelphiConfig, character: str, payload: JsonDict,
+                   content: str, questions: List[int]) -> Dict[int, JsonDict]:
+    """Ask for just the given questions again, continuing the original conversation."""
+    min_rating, max_rating = config.rating_range
+    min_conf, max_conf = config.confidence_range
+    instructions = REPAIR_INSTRUCTIONS.format(
+        questions=", ".join(map(str, questions)), min_rating=min_rating, max_rating=max_rating,
+        min_conf=min_conf, max_conf=max_conf
+    )
+    repair_payload = {k: v for k, v in payload.items() if k not in ("n", "response_format")}
+    repair_payload.update(
+        messages=payload["messages"] + [
+            {"role": "assistant", "content": content},
+            {"role": "user", "content": instructions}
+        ],
+        # Budget in proportion to the share of the questionnaire being redone
+        max_tokens=max(REPAIR_MIN_TOKENS, config.max_tokens * len(questions) // config.question_count),
+        stream=False
+    )
+    if config.constrained:
+        repair_payload["response_format"] = {
+            "type": "json_schema",
+            "json_schema": {"name": "delphi_repair", "strict": True,
+                            "schema": build_response_schema(config, questions)}
+        }
+    
+    try:
+        cache_key = config.cache.key(repair_payload)
+        cached = config.cache.get(cache_key) if config.use_cache else None
+        if cached is not None:
+            text = cached["content"]
+        else:
+            result = call_api(config, repair_payload)
+            record_usage(config, result)
+            text = result["choices"][0]["message"]["content"]
+        save_debug_file(config, character, text, "repair_response")
+        answers = parse_repair(config, text, questions)
+        # Only a repair that answered everything is worth replaying
+        if config.use_cache and cached is None and len(answers) == len(questions):
+            config.cache.put(cache_key, text, {"responses": list(answers.values())})
+        return answers
+    except Exception as e:
+        logger.error("Error requesting repair for %s: %s", character, e)
+        return {}
+
+
+def repair_response(config: DelphiConfig, character: str, parsed: JsonDict,
+                    content: str, payload: Optional[JsonDict]) -> JsonDict:
+    """Re-request only the missing or invalid questions and merge the answers in.
+    
+    Placeholders stay in place for questions that still fail after
+    config.repair_attempts follow-ups, or when there is no payload to
+    continue from.
+    """
+    defects = parsed.pop("defects", None)
+    if not defects or payload is None or config.repair_attempts <= 0:
+        return parsed
+    
+    for attempt in range(1, config.repair_attempts + 1):
+        logger.info("Requesting repair of question(s) %s for %s (attempt %s)",
+                    defects, character, attempt)
+        config.stats.incr("repair_requests")
+        with timed_stage("repair"):
+            answers = request_repair(config, character, payload, content, defects)
+        for number, answer in answers.items():
+            parsed["responses"][number - 1] = answer
+        config.stats.incr("questions_repaired", len(answers))
+        defects = [q for q in defects if q not in answers]
+        if not defects:
+            logger.info("Repaired all defective questions for %s", character)
+            break
+    else:
+        logger.warning("Question(s) %s for %s still invalid after repair", defects, character)
+    return parsed
+
+
+def parse_completions(config: DelphiConfig, character: str, content: Union[str, List[str]],
+                      payload: Optional[JsonDict] = None) -> Tuple[JsonDict, bool]:
+    """Parse a single completion, or parse and aggregate an ensemble of them.
+    
+    Given the request payload, missing or invalid questions are repaired
+    with follow-up requests. Also returns whether every completion parsed
+    without falling back to placeholder answers.
+    """
+    if isinstance(content, str):
+        parsed = extract_json(config, content, character)
+        fell_back = parsed.pop("fallback", False)
+        return repair_response(config, character, parsed, content, payload), not fell_back
+    
+    samples = []
+    fell_back = False
+    for i, sample_content in enumerate(content, 1):
+        label = f"{character}-sample{i}"
+        parsed = extract_json(config, sample_content, label)
+        fell_back = parsed.pop("fallback", False) or fell_back
+        samples.append(repair_response(config, label, parsed, sample_content, payload))
+        config.debug_writer.discard(label)  # Failed samples were already written
+    return aggregate_samples(config, samples), not fell_back
+
+
+def generate_character_response(config: DelphiConfig, character: str,
+                                round_spec: Optional[DelphiRound] = None,
+                                profile: Optional[str] = None) -> Optional[JsonDict]:
+    """Generate response from a character, looking up its profile unless one is given."""
+    # Prompt assets are loaded once per run by PromptAssets
+    with timed_stage("assets"):
+        profile = profile or config.assets.profile(character)
+        questionnaire = config.assets.questionnaire()
+    if not profile:
+        logger.error("No profile found for %s", character)
         return None
     
-    questionnaire = load_file(questionnaire_path)
     if not questionnaire:
+        logger.error("Questionnaire not found")
         return None
     
-    # Construct system message
-    system_msg = (
-        "You are participating in an ethical analysis of a difficult decision. "
-        "The scenario involves whether to revive (wake up) an ancient group of warriors "
-        "who have been in a special sleep for 900 years using advanced technology. "
-        "These warriors were once powerful and potentially dangerous. Respond as specified in "
-        "the character profile, considering the unique worldview, values, and decision-making style. "
-        "Analyze the dilemma from this perspective without explicitly stating \"As [Character]\" "
-        "or \"I am [Character].\" Your reasoning should authentically reflect the character's "
-        "thought patterns and values.\n\n"
-        "IMPORTANT: Your response MUST be properly formatted JSON with the following structure:\n"
-        + EXAMPLE_JSON + "\n"
-        "Your JSON must:\n"
-        "1. Include 6 questions, numbered 1-6\n"
-        "2. For each question, include a rating (1-7), position_summary, detailed_explanation, and confidence (1-5)\n"
-        "3. Use only standard ASCII characters in your JSON (no fancy quotes or special characters)\n"
-        "4. Not include any text before or after the JSON object\n\n"
-        "Return only the JSON object and nothing else."
-    )
-    
     # Construct API request
     payload = {
         "model": config.model,
         "messages": [
-            {"role": "system", "content": system_msg},
-            {"role": "user", "content": f"{profile}\n\n{questionnaire}"}
+            {"role": "system", "content": config.assets.system_message},
+            {"role": "user", "content": build_user_message(
+                config, character, profile, questionnaire, round_spec)}
         ],
         "temperature": config.temperature,
-        "max_tokens": config.max_tokens
+        "max_tokens": config.max_tokens,
+        "stream": config.stream
     }
+    if config.prompt_layout == "shared-prefix":
+        payload["cache_prompt"] = True  # Let llama.cpp reuse the KV cache of the common prefix
+    if config.constrained:
+        payload["response_format"] = {
+            "type": "json_schema",
+            "json_schema": {"name": "delphi_responses", "strict": True,
+                            "schema": config.assets.response_schema}
+        }
+    if config.samples > 1:
+        # Batched sampling returns whole choices; streaming is single-choice only
+        payload.update(n=config.samples, stream=False)
+    
+    prompt_tokens = sum(estimate_tokens(m["content"]) for m in payload["messages"])
+    config.stats.incr("estimated_prompt_tokens", prompt_tokens)
+    
+    # Keyed on the configured max_tokens, so cached answers survive budget changes
+    cache_key = config.cache.key(payload)
+    if config.use_cache:
+        cached = config.cache.get(cache_key)
+        if cached is not None:
+            config.stats.incr("cache_hits")
+            logger.debug("Cache hit for %s (%s)", character, cache_key[:12])
+            # Re-parse the raw completion so parsing/validation changes apply
+            with timed_stage("parse"):
+                return parse_completions(config, character, cached["content"], payload)[0]
+        config.stats.incr("cache_misses")
+    
+    if config.adaptive_max_tokens:
+        payload["max_tokens"] = config.budget.max_tokens(config, character, prompt_tokens)
+    budget_tokens = payload["max_tokens"] * config.samples
+    config.stats.incr("budget_tokens", budget_tokens)
+    record_metric("budget_tokens", budget_tokens)
     
     try:
-        # Call API with retry logic built into the function
-        call_with_config = partial(call_api, config)
-        result = call_with_config(payload)
-        content = result["choices"][0]["message"]["content"]
-        
-        # Log a sample of the response
-        content_preview = content[:100] + "..." if len(content) > 100 else content
-        logger.info(f"Received response for {character}, length: {len(content)} chars")
-        logger.info(f"Preview: {content_preview}")
+        if config.samples > 1:
+            with timed_stage("api"):
+                content: Union[str, List[str]] = request_samples(config, character, payload)
+            logger.debug("Received %s samples for %s", len(content), character)
+        else:
+            # Call API with retry logic built into the function
+            call_with_config = partial(call_api, config)
+            with timed_stage("api"):
+                result = call_with_config(payload)
+            record_usage(config, result)
+            choice = result["choices"][0]
+            content = choice["message"]["content"]
+            completion_tokens = (result.get("usage") or {}).get("completion_tokens") or estimate_tokens(content)
+            if choice.get("finish_reason") == "length":
+                content, completion_tokens = continue_truncated(config, character, payload, content,
+                                                                completion_tokens)
+            config.budget.observe(character, completion_tokens)
+            
+            # Log a sample of the response
+            logger.debug("Received response for %s, length: %s chars", character, len(content))
+            logger.debug("Preview: %s%s", content[:100], "..." if len(content) > 100 else "")
         
         # Parse and validate response
-        return extract_json(config, content, character)
+        with timed_stage("parse"):
+            parsed, clean = parse_completions(config, character, content, payload)
+        # A completion that could not be parsed would otherwise be replayed on every run
+        if config.use_cache and clean:
+            config.cache.put(cache_key, content, parsed)
+        return parsed
     
     except Exception as e:
-        logger.error(f"Error generating response for {character}: {str(e)}")
+        if isinstance(e, DeadlineExceeded):
+            config.stats.incr("deadlines_exceeded")
+        logger.error("Error generating response for %s: %s", character, e)
         return None
 
 
-def run_delphi_round_one(config: DelphiConfig) -> None:
-    """Execute the first round of the Delphi Method."""
-    logger.info(f"Starting Delphi Method - Round One")
-    logger.info(f"Using API URL: {config.base_url}")
-    
-    all_responses = {}
-    successful = []
-    failed = []
-    
-    for character in config.characters:
-        logger.info(f"Processing {character}")
+def process_character(config: DelphiConfig, character: str,
+                      round_spec: Optional[DelphiRound] = None,
+                      profile: Optional[str] = None) -> Optional[JsonDict]:
+    """Generate, format and save the response for a single character."""
+    round_spec = round_spec or DelphiRound.create(config, 1)
+    deadline = time.monotonic() + config.character_deadline if config.character_deadline > 0 else None
+    with character_context(config.metrics, character), deadline_context(deadline, round_spec.deadline), \
+            timed_stage("total"):
+        logger.debug("Processing %s", character)
         
         # Get response
-        response_data = generate_character_response(config, character)
+        response_data = generate_character_response(config, character, round_spec, profile)
         if not response_data:
-            logger.error(f"Failed to get valid response for {character}")
-            failed.append(character)
-            continue
+            logger.error("Failed to get valid response for %s", character)
+            config.debug_writer.fail(character)
+            return None
+        config.debug_writer.discard(character)
         
         # Format as markdown
-        markdown = format_markdown(character, response_data)
+        with timed_stage("format_markdown"):
+            markdown = format_markdown(character, response_data, round_spec.number)
         
         # Save response
-        if save_response(config, character, response_data, markdown):
+        with timed_stage("save_response"):
+            # Streamed panels keep results in the JSONL composite only
+            saved = save_response(config, character, response_data, markdown, round_spec.output_dir,
+                                  save_json=config.panel is None)
+        if not saved:
+            return None
+        
+        logger.debug("Successfully processed %s", character)
+        return response_data
+
+
+def stream_characters(config: DelphiConfig, personas: Iterable[Persona],
+                      on_result: Callable[[str, Optional[JsonDict]], None],
+                      round_spec: Optional[DelphiRound] = None) -> None:
+    """Process personas as they are read, in parallel up to config.max_concurrency per endpoint.
+    
+    Only a couple of personas per worker are read ahead, and nothing is
+    retained: `on_result` is called on this thread with each result (None on
+    failure) as soon as it is available.
+    """
+    workers = config.max_concurrency * len(config.endpoints)
+    if workers <= 1:
+        for persona in personas:
+            on_result(persona.name, process_character(config, persona.name, round_spec, persona.profile))
+        return
+    
+    with ThreadPoolExecutor(max_workers=workers, 
+                            thread_name_prefix="delphi") as executor:
+        in_flight: Dict[Future, str] = {}
+        
+        def collect_finished() -> None:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                character = in_flight.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error("Unexpected error processing %s: %s", character, e)
+                    result = None
+                on_result(character, result)
+        
+        for persona in personas:
+            if len(in_flight) >= 2 * workers:
+                collect_finished()
+            future = executor.submit(process_character, config, persona.name, round_spec, persona.profile)
+            in_flight[future] = persona.name
+        while in_flight:
+            collect_finished()
+
+
+def run_characters(config: DelphiConfig, characters: List[str],
+                   on_result: Optional[Callable[[str, JsonDict], None]] = None,
+                   round_spec: Optional[DelphiRound] = None
+                   ) -> Dict[str, Optional[JsonDict]]:
+    """Process characters, in parallel up to config.max_concurrency per endpoint.
+    
+    `on_result` is called with each successful result as soon as it is available.
+    """
+    results = {}
+    
+    def collect(character: str, result: Optional[JsonDict]) -> None:
+        results[character] = result
+        if result and on_result:
+            on_result(character, result)
+    
+    stream_characters(config, (Persona(c) for c in characters), collect, round_spec)
+    return results
+
+
+def prompt_assets_error(config: DelphiConfig) -> Optional[str]:
+    """Load prompt assets, returning what is missing or None when everything was found."""
+    if config.panel is not None and not config.panel.exists():
+        return f"Panel not found: {config.panel}"
+    # Streamed panels carry their own profiles and are not checked up front
+    missing = config.assets.load([] if config.panel is not None else config.characters)
+    if missing:
+        return f"No profile found for: {', '.join(missing)}"
+    if not config.assets.questionnaire():
+        return "Questionnaire not found"
+    return None
+
+
+def load_prompt_assets(config: DelphiConfig) -> bool:
+    """Load prompt assets up front so missing files fail before any API spend."""
+    error = prompt_assets_error(config)
+    if error:
+        logger.error(error)
+        return False
+    return True
+
+
+class RoundRecorder:
+    """Records each completed character in the round's journal and the results store."""
+    def __init__(self, config: DelphiConfig, round_spec: DelphiRound, journal: RunJournal):
+        self.journal = journal
+        self.store = config.store
+        self.store_run = None
+        if self.store is not None:
+            self.store_run = self.store.start_run(
+                config.run_id, round_spec.number, model=config.model, temperature=config.temperature,
+                max_tokens=config.max_tokens, samples=config.samples, prompt_layout=config.prompt_layout
+            )
+    
+    def restored(self, character: str, result: JsonDict) -> None:
+        """A result carried over from the journal of an interrupted run."""
+        if self.store is not None:
+            self.store.add(self.store_run, character, result)
+    
+    def record(self, character: str, result: JsonDict) -> None:
+        """A result completed in this run."""
+        self.journal.record(character, result)
+        self.restored(character, result)
+    
+    def close(self) -> None:
+        if self.store is not None:
+            self.store.flush()
+
+
+def index_round(config: DelphiConfig, round_spec: DelphiRound,
+                results: Iterable[Tuple[str, JsonDict]], batch_size: int = 1024) -> None:
+    """Append a finished round's summaries and explanations to the vector index in batches.
+    
+    Answers already indexed for this run and round (on resume, say) are skipped.
+    """
+    if config.vectors is None:
+        return
+    added = 0
+    batch: List[JsonDict] = []
+    try:
+        for character, result in results:
+            batch.extend(iter_chunks(character, result, round_spec.number, config.run_id))
+            if len(batch) >= batch_size:
+                added += config.vectors.add(batch)
+                batch = []
+        added += config.vectors.add(batch)
+        logger.info("Indexed %s chunks from round %s in %s",
+                    added, round_spec.number, config.vector_dir)
+    except Exception as e:
+        logger.error("Error updating vector index %s: %s", config.vector_dir, e)
+
+
+def run_panel_round(config: DelphiConfig, round_spec: DelphiRound) -> JsonlResults:
+    """Execute one round over a streamed panel, with memory use independent of its size.
+    
+    Personas are read lazily from config.panel and each result is appended
+    to round{n}_responses.jsonl as it completes, which doubles as the resume
+    journal. With config.merge_composite the JSONL is also merged into the
+    usual round{n}_responses.json layout at the end.
+    """
+    stats_before = config.stats.snapshot()
+    jsonl_path = round_spec.output_dir / round_spec.composite_json.with_suffix(".jsonl")
+    journal = RunJournal(jsonl_path)
+    recorder = RoundRecorder(config, round_spec, journal)
+    completed: Mapping = {}
+    if config.resume:
+        completed = journal.completed()
+        logger.info("Resuming: %s characters already completed", len(completed))
+        for character, result in completed.stream():
+            recorder.restored(character, result)
+    else:
+        journal.reset()
+    
+    outcome: Counter = Counter()
+    failed: List[str] = []
+    
+    def record(character: str, result: Optional[JsonDict]) -> None:
+        if result:
+            recorder.record(character, result)
+            outcome["successful"] += 1
+        else:
+            failed.append(character)
+        processed = outcome["successful"] + len(failed)
+        if processed % PANEL_PROGRESS_INTERVAL == 0:
+            logger.info("Progress: %s characters processed, %s failed", processed, len(failed))
+    
+    personas = (p for p in iter_personas(config.panel) if p.name not in completed)
+    stream_characters(config, personas, record, round_spec)
+    recorder.close()
+    
+    results = JsonlResults(jsonl_path)
+    index_round(config, round_spec, results.stream())
+    if results:
+        logger.info("Round %s complete. Results saved to %s", round_spec.number, jsonl_path)
+        if config.merge_composite:
+            try:
+                composite_path = round_spec.output_dir / round_spec.composite_json
+                merge_composite(results, composite_path)
+                logger.info("Merged composite JSON saved to %s", composite_path)
+            except Exception as e:
+                logger.error("Error saving composite JSON: %s", e)
+    else:
+        logger.error("No successful responses were generated")
+    
+    report_round(config, round_spec, stats_before, len(results) + len(failed), len(results),
+                 failed, outcome["successful"] + len(failed))
+    return results
+
+
+def run_delphi_round(config: DelphiConfig, round_spec: DelphiRound) -> Mapping:
+    """Execute one round of the Delphi Method and return the successful responses."""
+    logger.info("Starting Delphi Method - Round %s", round_spec.number)
+    logger.info("Using API URL: %s", ', '.join(config.endpoints))
+    logger.info("Max concurrency: %s per endpoint", config.max_concurrency)
+    config.metrics = RunMetrics(config.run_id, round_spec.number, per_character=config.panel is None)
+    _context.run_id = config.run_id  # Stamped on this thread's log records
+    if config.round_deadline > 0:
+        round_spec.deadline = time.monotonic() + config.round_deadline
+    if round_spec.number == 1 and not config.resume:
+        (round_spec.output_dir / RUN_ID_FILE).write_text(config.run_id, encoding="utf-8")
+    if config.panel is not None:
+        return run_panel_round(config, round_spec)
+    
+    all_responses = {}
+    successful = []
+    failed = []
+    stats_before = config.stats.snapshot()
+    
+    # Reload completed characters from the journal when resuming
+    journal = RunJournal(round_spec.output_dir / round_spec.journal_file)
+    recorder = RoundRecorder(config, round_spec, journal)
+    if config.resume:
+        completed = journal.load()
+        logger.info("Resuming: %s characters already completed", len(completed))
+        for character, result in completed.items():
+            if character in config.characters:
+                recorder.restored(character, result)
+    else:
+        completed = {}
+        journal.reset()
+    
+    pending = [c for c in config.characters if c not in completed]
+    results = run_characters(config, pending, on_result=recorder.record, round_spec=round_spec)
+    recorder.close()
+    results.update({c: r for c, r in completed.items() if c in config.characters})
+    
+    # Collect in panel order so the composite JSON is deterministic
+    for character in config.characters:
+        response_data = results.get(character)
+        if response_data:
             all_responses[character] = response_data
             successful.append(character)
-            logger.info(f"Successfully processed {character}")
         else:
             failed.append(character)
-        
-        # Brief pause to avoid overwhelming the API
-        time.sleep(2)
+    index_round(config, round_spec, all_responses.items())
     
     # Save composite JSON if we have any successful responses
     if all_responses:
         try:
-            composite_path = config.output_dir / config.composite_json
+            composite_path = round_spec.output_dir / round_spec.composite_json
             composite_path.write_text(
                 json.dumps(all_responses, indent=2),
                 encoding="utf-8"
             )
             
-            logger.info(f"Round One complete. Results saved to {composite_path}")
+            logger.info("Round %s complete. Results saved to %s", round_spec.number, composite_path)
             
             # Clean up individual JSON files
             logger.info("Cleaning up individual JSON files...")
             for character in successful:
-                json_path = config.output_dir / f"{character}.json"
+                json_path = round_spec.output_dir / f"{character}.json"
                 if json_path.exists():
                     json_path.unlink()  # Delete the file
-                    logger.info(f"Removed {json_path}")
+                    logger.debug("Removed %s", json_path)
             
             if successful:
-                logger.info(f"Successfully processed: {', '.join(successful)}")
+                logger.info("Successfully processed: %s", ', '.join(successful))
             
             if failed:
-                logger.warning(f"Failed to process: {', '.join(failed)}")
+                logger.warning("Failed to process: %s", ', '.join(failed))
                 
         except Exception as e:
-            logger.error(f"Error saving composite JSON: {str(e)}")
+            logger.error("Error saving composite JSON: %s", e)
     else:
         logger.error("No successful responses were generated")
     
-    # Generate summary report
-    logger.info("=== Delphi Round One Summary ===")
-    logger.info(f"Total characters: {len(config.characters)}")
-    logger.info(f"Successfully processed: {len(successful)} characters")
-    logger.info(f"Failed: {len(failed)} characters")
+    report_round(config, round_spec, stats_before, len(config.characters), len(successful),
+                 failed, len(pending))
+    return all_responses
+
+
+def report_round(config: DelphiConfig, round_spec: DelphiRound, stats_before: Counter,
+                 total: int, successful: int, failed: List[str], requests_made: int) -> None:
+    """Log the round summary and write its metrics files."""
+    stats = config.stats.snapshot() - stats_before
+    logger.info("=== Delphi Round %s Summary ===", round_spec.number)
+    logger.info("Total characters: %s", total)
+    logger.info("Successfully processed: %s characters", successful)
+    logger.info("Failed: %s characters", len(failed))
     if failed:
-        logger.info(f"Failed characters: {', '.join(failed)}")
-    logger.info(f"Results saved to: {config.output_dir}")
-    logger.info(f"Debug files saved to: {config.debug_dir}")
+        shown = ', '.join(failed[:FAILED_NAMES_SHOWN])
+        more = f" and {len(failed) - FAILED_NAMES_SHOWN} more" if len(failed) > FAILED_NAMES_SHOWN else ""
+        logger.info("Failed characters: %s%s", shown, more)
+    if config.use_cache:
+        logger.info("Cache hits: %s, misses: %s", stats['cache_hits'], stats['cache_misses'])
+    logger.info("Parsed strictly: %s, standard_json: %s, hjson: %s, fallbacks: %s",
+                stats['parsed_strict'], stats['parsed_standard_json'], stats['parsed_hjson'],
+                stats['parse_fallbacks'])
+    if stats['repair_requests']:
+        logger.info("Repairs: %s requests, %s questions repaired",
+                    stats['repair_requests'], stats['questions_repaired'])
+    if stats['budget_tokens']:
+        logger.info("Token budget: %s completion tokens reserved, %s used (%.0f%%), %s continuations",
+                    stats['budget_tokens'], stats['completion_tokens'],
+                    100 * stats['completion_tokens'] / stats['budget_tokens'], stats['continuations'])
+    if stats['hedged_requests']:
+        logger.info("Hedged requests: %s, %s answered first by the duplicate",
+                    stats['hedged_requests'], stats['hedges_won'])
+    if stats['deadlines_exceeded']:
+        logger.warning("Deadlines exceeded: %s characters", stats['deadlines_exceeded'])
+    config.budget.save()
+    requests_made = requests_made or 1
+    logger.info("Prompt tokens: ~%s per character (estimated), feedback block ~%s",
+                stats['estimated_prompt_tokens'] // requests_made,
+                estimate_tokens(round_spec.feedback or ''))
+    logger.info("API usage: %s prompt tokens, %s completion tokens",
+                stats['prompt_tokens'], stats['completion_tokens'])
+    if stats['estimated_completion_tokens']:
+        logger.info("Completion tokens include ~%s estimated for streams stopped early",
+                    stats['estimated_completion_tokens'])
+    if stats['prompt_eval_ms']:
+        logger.info("Prompt eval: %s tokens evaluated in %.2fs (%s served from the prompt cache)",
+                    stats['prompt_eval_tokens'], stats['prompt_eval_ms'] / 1000,
+                    max(0, stats['prompt_tokens'] - stats['prompt_eval_tokens']))
+    if len(config.endpoints) > 1:
+        for url, count in config.client.endpoints.request_counts().items():
+            logger.info("Endpoint %s: %s requests so far", url, count)
+    try:
+        metrics_paths = config.metrics.write(round_spec.output_dir, f"round{round_spec.number}")
+        logger.info("Metrics saved to: %s", ', '.join(str(p) for p in metrics_paths))
+    except Exception as e:
+        logger.error("Error saving metrics: %s", e)
+    logger.info("Results saved to: %s", round_spec.output_dir)
+    config.debug_writer.flush()
+    if config.debug_writer.written:
+        logger.info("Debug files saved to: %s (%s files)", config.debug_writer.directory,
+                    config.debug_writer.written)
+
+
+def run_delphi_round_one(config: DelphiConfig) -> Mapping:
+    """Execute the first round of the Delphi Method."""
+    if not load_prompt_assets(config):
+        return {}
+    return run_delphi_round(config, DelphiRound.create(config, 1))
+
+
+def run_delphi(config: DelphiConfig) -> Mapping:
+    """Run config.rounds rounds, feeding each round a summary of the previous one."""
+    if not load_prompt_assets(config):
+        return {}
+    return run_delphi_rounds(config)
+
+
+def run_delphi_rounds(config: DelphiConfig) -> Mapping:
+    """Run config.rounds rounds with the prompt assets already loaded."""
+    responses: Mapping = {}
+    for number in range(1, config.rounds + 1):
+        if number > 1 and not responses:
+            logger.error("Round %s produced no responses, stopping", number - 1)
+            break
+        responses = run_delphi_round(config, DelphiRound.create(config, number, responses))
+    return responses
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Run the Delphi Method simulation.")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Bypass the on-disk response cache")
+    parser.add_argument("--resume", action="store_true",
+                        help="Resume an interrupted round from its progress journal")
+    parser.add_argument("--rounds", type=int, default=1,
+                        help="Number of Delphi rounds to run (default: 1)")
+    parser.add_argument("--samples", type=int, default=1,
+                        help="Completions per character; more than one aggregates an ensemble")
+    parser.add_argument("--panel", type=Path, default=None,
+                        help="Directory of .txt profiles or JSONL file of personas to stream "
+                             "instead of the built-in characters (default: PANEL)")
+    parser.add_argument("--questionnaire", type=Path, default=None,
+                        help="Questionnaire file (default: initial-question.md or questionnaire.md)")
+    parser.add_argument("--merge-composite", action="store_true",
+                        help="After a panel round, also merge its JSONL results into roundN_responses.json")
+    parser.add_argument("--no-store", action="store_true",
+                        help="Do not append results to the SQLite results store")
+    parser.add_argument("--vector-index", type=Path, default=None,
+                        help="Directory of the vector index of explanations to extend each round "
+                             "(default: VECTOR_INDEX)")
+    parser.add_argument("--retrieve", type=int, default=0, metavar="K",
+                        help="Show K related arguments from other panelists per question in later "
+                             "rounds (needs a vector index)")
+    parser.add_argument("--character-deadline", type=float, default=0.0, metavar="SECONDS",
+                        help="Give up on a character after this long, including retries")
+    parser.add_argument("--round-deadline", type=float, default=0.0, metavar="SECONDS",
+                        help="Give up on characters still unanswered this long after a round starts")
+    parser.add_argument("--hedge-percentile", type=float, default=None, metavar="P",
+                        help="Duplicate requests still unanswered at this latency percentile, "
+                             "taking the first answer (default: HEDGE_PERCENTILE or off)")
+    parser.add_argument("--no-repair", action="store_true",
+                        help="Keep placeholders instead of re-requesting missing or invalid questions")
+    parser.add_argument("--constrained", action="store_true",
+                        help="Send a JSON schema so the server constrains output to valid answers")
+    parser.add_argument("--prompt-layout", choices=PROMPT_LAYOUTS, default=None,
+                        help="Prompt order; shared-prefix puts the persona last for prompt caching "
+                             "(default: PROMPT_LAYOUT or profile-first)")
+    parser.add_argument("--log-level", choices=("DEBUG", "INFO", "WARNING", "ERROR"), type=str.upper,
+                        default=None, help="Log verbosity; DEBUG adds per-request detail "
+                                           "(default: LOG_LEVEL or INFO)")
+    return parser.parse_args(argv)
 
 
 def main():
     """Main entry point for the script."""
+    args = parse_args()
+    
     # Create the configuration
-    config = DelphiConfig()
+    # Options left unset on the command line keep their environment defaults
+    overrides: JsonDict = {}
+    if args.prompt_layout:
+        overrides["prompt_layout"] = args.prompt_layout
+    if args.constrained:
+        overrides["constrained"] = True
+    if args.no_repair:
+        overrides["repair_attempts"] = 0
+    if args.panel:
+        overrides["panel"] = args.panel
+    if args.no_store:
+        overrides["results_db"] = None
+    if args.questionnaire:
+        overrides["questionnaire"] = args.questionnaire
+    if args.hedge_percentile is not None:
+        overrides["hedge_percentile"] = args.hedge_percentile
+    if args.vector_index:
+        overrides["vector_dir"] = args.vector_index
+    if args.retrieve:
+        overrides["retrieved_arguments"] = args.retrieve
+    if args.log_level:
+        overrides["log_level"] = args.log_level
+    config = DelphiConfig(use_cache=not args.no_cache, resume=args.resume, 
+                          rounds=args.rounds, samples=args.samples,
+                          character_deadline=args.character_deadline, round_deadline=args.round_deadline,
+                          merge_composite=args.merge_composite, **overrides)
     
     # Set up logging
     global logger
     logger = setup_logging(config)
     
-    logger.info(f"Delphi Method Simulation started")
-    run_delphi_round_one(config)
+    logger.info("Delphi Method Simulation started")
+    try:
+        run_delphi(config)
+    finally:
+        config.debug_writer.close()
+        config.client.close()
+        if config.store is not None:
+            config.store.close()
+        stop_logging()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Consensus and convergence analytics for Delphi results.
+
+Composite JSON files (one per round) are loaded into dense NumPy arrays shaped
+characters x questions x rounds x samples, optionally with a leading runs axis
+for parameter sweeps. Missing answers are NaN. All statistics are vectorized
+over the trailing axes, so they apply unchanged to a single run or thousands.
+"""
+import argparse
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple, Union
+
+import numpy as np
+
+PathLike = Union[str, Path]
+
+# Axis positions, counted from the end so a leading runs axis broadcasts
+CHARACTER_AXIS = -4
+QUESTION_AXIS = -3
+ROUND_AXIS = -2
+SAMPLE_AXIS = -1
+
+
+@dataclass
+class PanelArray:
+    """Ratings and confidence for a panel, shaped ([runs,] characters, questions, rounds, samples)."""
+    characters: List[str]
+    ratings: np.ndarray
+    confidence: np.ndarray
+
+
+def _entry_samples(entry: Dict[str, Any]) -> List[List[Dict[str, Any]]]:
+    """The list of response lists for a character: one per ensemble sample."""
+    if entry.get("samples"):
+        return [sample.get("responses", []) for sample in entry["samples"]]
+    return [entry.get("responses", [])]
+
+
+def _read_composite(path: PathLike) -> Dict[str, Any]:
+    """A composite JSON file, or the JSONL results of a streamed panel round."""
+    path = Path(path)
+    if path.suffix == ".jsonl":
+        with path.open(encoding="utf-8") as f:
+            entries = (json.loads(line) for line in f if line.strip())
+            return {entry["character"]: entry["result"] for entry in entries}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _read_composites(paths: Sequence[PathLike]) -> List[Dict[str, Any]]:
+    return [_read_composite(p) for p in paths]
+
+
+def _collect(runs: List[List[Dict[str, Any]]]) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """Flatten all answers into index columns and value columns in one pass.
+
+    Returns the character order, an integer array of (run, character,
+    question, round, sample) indices and a float array of (rating, confidence).
+    """
+    characters: Dict[str, int] = {}
+    indices: List[Tuple[int, int, int, int, int]] = []
+    values: List[Tuple[float, float]] = []
+    for run, composites in enumerate(runs):
+        for rnd, composite in enumerate(composites):
+            for character, entry in composite.items():
+                c = characters.setdefault(character, len(characters))
+                for s, responses in enumerate(_entry_samples(entry)):
+                    for response in responses:
+                        q = int(response.get("question", 0)) - 1
+                        if q < 0:
+                            continue
+                        indices.append((run, c, q, rnd, s))
+                        values.append((response.get("rating", np.nan),
+                                       response.get("confidence", np.nan)))
+    return (list(characters),
+            np.array(indices, dtype=np.intp).reshape(-1, 5),
+            np.array(values, dtype=float).reshape(-1, 2))
+
+
+def load_rounds(paths: Sequence[PathLike]) -> PanelArray:
+    """Load the composite JSON of each round of one run, in round order."""
+    panel = load_runs([paths])
+    return PanelArray(panel.characters, panel.ratings[0], panel.confidence[0])
+
+
+def load_runs(runs: Sequence[Sequence[PathLike]]) -> PanelArray:
+    """Load many runs (each a sequence of per-round composite files) with a leading runs axis."""
+    data = [_read_composites(paths) for paths in runs]
+    characters, indices, values = _collect(data)
+    extents = indices.max(axis=0) + 1 if len(indices) else np.zeros(5, dtype=np.intp)
+    shape = (len(data), len(characters)) + tuple(int(e) for e in extents[2:])
+    ratings = np.full(shape, np.nan)
+    confidence = np.full(shape, np.nan)
+    target = tuple(indices.T)
+    ratings[target] = values[:, 0]
+    confidence[target] = values[:, 1]
+    return PanelArray(characters, ratings, confidence)
+
+
+def _panel_values(values: np.ndarray) -> np.ndarray:
+    """Move the character and sample axes together so they can be reduced as one."""
+    moved = np.moveaxis(values, CHARACTER_AXIS, -1)       # ..., Q, R, S, C
+    return moved.reshape(moved.shape[:-2] + (-1,))        # ..., Q, R, S*C
+
+
+def _nan_percentiles(values: np.ndarray, percentiles: Sequence[float]) -> np.ndarray:
+    """Linear-interpolated percentiles along the last axis, ignoring NaN.
+
+    Equivalent to np.nanpercentile, but done with one sort and index
+    arithmetic instead of a per-slice Python loop. Result has a leading
+    axis over `percentiles`.
+    """
+    ordered = np.sort(values, axis=-1)  # NaN sorts last
+    counts = (~np.isnan(values)).sum(axis=-1)
+    fractions = np.asarray(percentiles, dtype=float).reshape((-1,) + (1,) * (counts.ndim + 1)) / 100.0
+    positions = (np.maximum(counts, 1) - 1)[None, ..., None] * fractions
+    lower = np.floor(positions).astype(int)
+    upper = np.ceil(positions).astype(int)
+    low = np.take_along_axis(ordered[None], lower, axis=-1)[..., 0]
+    high = np.take_along_axis(ordered[None], upper, axis=-1)[..., 0]
+    result = low + (high - low) * (positions - lower)[..., 0]
+    return np.where(counts > 0, result, np.nan)
+
+
+def question_medians(ratings: np.ndarray) -> np.ndarray:
+    """Median rating per question and round, shape (..., questions, rounds)."""
+    return _nan_percentiles(_panel_values(ratings), [50])[0]
+
+
+def question_iqr(ratings: np.ndarray) -> np.ndarray:
+    """Interquartile range of ratings per question and round."""
+    q75, q25 = _nan_percentiles(_panel_values(ratings), [75, 25])
+    return q75 - q25
+
+
+def confidence_weighted_means(ratings: np.ndarray, confidence: np.ndarray) -> np.ndarray:
+    """Mean rating per question and round, weighting each answer by its confidence."""
+    valid = ~(np.isnan(ratings) | np.isnan(confidence))
+    weights = np.where(valid, confidence, 0.0)
+    weighted = np.where(valid, ratings, 0.0) * weights
+    total = _panel_values(weights).sum(axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return _panel_values(weighted).sum(axis=-1) / total
+
+
+def _nan_mean(values: np.ndarray, axis: int) -> np.ndarray:
+    """np.nanmean without the empty-slice warning."""
+    counts = (~np.isnan(values)).sum(axis=axis)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, np.nansum(values, axis=axis) / counts, np.nan)
+
+
+def _average_ranks(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Average (tie-aware) ranks along the last axis, plus tie group sizes per item."""
+    greater = (values[..., :, None] > values[..., None, :]).sum(axis=-1)
+    ties = (values[..., :, None] == values[..., None, :]).sum(axis=-1)
+    return greater + (ties + 1) / 2.0, ties
+
+
+def kendalls_w(ratings: np.ndarray) -> np.ndarray:
+    """Kendall's coefficient of concordance across characters, per round.
+
+    Characters are the raters and questions the ranked items; samples are
+    averaged first. Characters with any missing answer in a round are left
+    out of that round. Includes the standard correction for tied ranks.
+    Returns shape (..., rounds).
+    """
+    means = _nan_mean(ratings, axis=SAMPLE_AXIS)          # ..., C, Q, R
+    per_rater = np.moveaxis(means, -1, -3)                # ..., R, C, Q
+    valid = ~np.isnan(per_rater).any(axis=-1)             # ..., R, C
+    ranks, ties = _average_ranks(np.nan_to_num(per_rater))
+    ranks = np.where(valid[..., None], ranks, 0.0)
+
+    m = valid.sum(axis=-1)                                # ..., R
+    n = per_rater.shape[-1]
+    rank_sums = ranks.sum(axis=-2)                        # ..., R, Q
+    mean_rank_sum = m[..., None] * (n + 1) / 2.0
+    s = ((rank_sums - mean_rank_sum) ** 2).sum(axis=-1)
+    tie_correction = np.where(valid, (ties ** 2 - 1).sum(axis=-1), 0).sum(axis=-1)
+    denominator = m ** 2 * (n ** 3 - n) - m * tie_correction
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(denominator > 0, 12.0 * s / denominator, np.nan)
+
+
+def convergence(ratings: np.ndarray) -> Dict[str, np.ndarray]:
+    """Round-over-round convergence measures.
+
+    - iqr_change: change in IQR per question between consecutive rounds
+      (negative means the panel is converging), shape (..., questions, rounds-1)
+    - mean_abs_change: mean absolute change of each character's rating
+      between consecutive rounds, per question, shape (..., questions, rounds-1)
+    """
+    iqr = question_iqr(ratings)
+    means = _nan_mean(ratings, axis=SAMPLE_AXIS)          # ..., C, Q, R
+    change = np.abs(np.diff(means, axis=-1))              # ..., C, Q, R-1
+    return {
+        "iqr_change": np.diff(iqr, axis=-1),
+        "mean_abs_change": _nan_mean(change, axis=-3),
+    }
+
+
+def summarize(panel: PanelArray) -> Dict[str, Any]:
+    """All statistics for a panel as nested lists, suitable for JSON output."""
+    result = {
+        "characters": panel.characters,
+        "shape": list(panel.ratings.shape),
+        "median": question_medians(panel.ratings),
+        "iqr": question_iqr(panel.ratings),
+        "confidence_weighted_mean": confidence_weighted_means(panel.ratings, panel.confidence),
+        "kendalls_w": kendalls_w(panel.ratings),
+    }
+    result.update(convergence(panel.ratings))
+    return {k: v.tolist() if isinstance(v, np.ndarray) else v for k, v in result.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Consensus statistics for Delphi composite JSON files.")
+    parser.add_argument("composites", nargs="+", type=Path,
+                        help="Composite JSON (or panel JSONL) files, one per round, in round order")
+    args = parser.parse_args()
+
+    panel = load_rounds(args.composites)
+    medians = question_medians(panel.ratings)
+    iqr = question_iqr(panel.ratings)
+    weighted = confidence_weighted_means(panel.ratings, panel.confidence)
+    w = kendalls_w(panel.ratings)
+
+    print(f"{len(panel.characters)} characters, {medians.shape[0]} questions, {medians.shape[1]} rounds")
+    for r in range(medians.shape[1]):
+        print(f"\nRound {r + 1} (Kendall's W = {w[r]:.3f})")
+        for q in range(medians.shape[0]):
+            print(f"  Q{q + 1}: median {medians[q, r]:.1f}  IQR {iqr[q, r]:.2f}  "
+                  f"confidence-weighted mean {weighted[q, r]:.2f}")
+
+    if medians.shape[1] > 1:
+        changes = convergence(panel.ratings)
+        print("\nConvergence (IQR change per question, round to round):")
+        for q, row in enumerate(changes["iqr_change"]):
+            print(f"  Q{q + 1}: " + "  ".join(f"{v:+.2f}" for v in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+Long-running Delphi service with an HTTP job API.
+
+Keeps one warm DelphiConfig for the life of the process: its HTTP
+connection pool, response cache, results store, vector index and loaded
+profiles are shared by every job. Jobs are queued and run by a fixed
+number of worker threads, so a submitted job starts LLM work as soon as
+a worker is free instead of after a container start.
+
+    POST   /jobs               submit a job; body is a JSON object of JOB_FIELDS
+    GET    /jobs               status of all jobs
+    GET    /jobs/{id}          status of one job
+    GET    /jobs/{id}/results  the final round's responses (JSON, or JSONL for panels)
+    DELETE /jobs/{id}          cancel a queued job
+    GET    /health             worker and queue counts
+
+Jobs name panel and questionnaire files relative to --inputs-dir and
+cannot reach files outside it. The API has no authentication, so it
+listens on localhost unless --host says otherwise.
+
+Usage: python delphi_service.py [--port 8080] [--workers 2] [--jobs-dir service/jobs]
+                                [--inputs-dir service/inputs]
+"""
+import argparse
+import dataclasses
+import json
+import logging
+import queue
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+import delphi
+from delphi import DelphiConfig, DelphiRound, JsonlResults
+
+logger = logging.getLogger('delphi')
+
+JsonDict = Dict[str, Any]
+
+def json_bool(value: Any) -> bool:
+    """Accept only JSON true/false, so "false" or 0 cannot switch a feature on."""
+    if not isinstance(value, bool):
+        raise ValueError(f"expected true or false, got {value!r}")
+    return value
+
+
+def json_int(minimum: int) -> Callable[[Any], int]:
+    """A converter accepting only JSON integers of at least `minimum`."""
+    def convert(value: Any) -> int:
+        if not isinstance(value, int) or isinstance(value, bool):
+            raise ValueError(f"expected an integer, got {value!r}")
+        if value < minimum:
+            raise ValueError(f"must be at least {minimum}, got {value}")
+        return value
+    return convert
+
+
+def character_list(value: Any) -> List[str]:
+    """Accept only a non-empty list of character names that are safe file names."""
+    if not isinstance(value, list) or not value:
+        raise ValueError("expected a non-empty list of character names")
+    for name in value:
+        if not isinstance(name, str) or not delphi.is_safe_name(name):
+            raise ValueError(f"invalid character name {name!r}")
+    return value
+
+
+# Settings a job may choose, with their conversions; everything else comes from the service
+JOB_FIELDS: Dict[str, Callable[[Any], Any]] = {
+    "characters": character_list,
+    "panel": str,  # relative to the service's inputs directory
+    "questionnaire": str,
+    "model": str,
+    "temperature": float,
+    "max_tokens": json_int(1),
+    "samples": json_int(1),
+    "rounds": json_int(1),
+    "prompt_layout": str,
+    "constrained": json_bool,
+    "stream": json_bool,
+    "repair_attempts": json_int(0),  # 0 disables repair
+    "use_cache": json_bool,
+    "merge_composite": json_bool,
+    "retrieved_arguments": json_int(0),
+}
+
+
+@dataclass
+class Job:
+    """A submitted round job and its progress."""
+    id: str
+    params: JsonDict
+    status: str = "queued"  # queued, running, done, failed, cancelled
+    submitted: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    error: Optional[str] = None
+    # Held only until the job finishes; what the status needs is kept below
+    config: Optional[DelphiConfig] = field(default=None, repr=False)
+    output_dir: Optional[Path] = None
+    stats: Optional[Dict[str, int]] = None
+    characters: Optional[int] = None
+    results_file: Optional[Path] = None
+
+    def to_json(self) -> JsonDict:
+        status = {
+            "id": self.id, "status": self.status, "params": self.params,
+            "submitted": self.submitted, "started": self.started, "finished": self.finished,
+        }
+        if self.error:
+            status["error"] = self.error
+        if self.output_dir is not None:
+            status["output_dir"] = str(self.output_dir)
+        config = self.config
+        stats = dict(config.stats.snapshot()) if config is not None else self.stats
+        if stats is not None:
+            status["stats"] = stats
+        if self.characters is not None:
+            status["characters"] = self.characters
+        return status
+
+    def release(self, results: Optional[Mapping] = None) -> None:
+        """Keep the status summary and where the final round was saved, then drop the job's state."""
+        if self.config is not None:
+            self.stats = dict(self.config.stats.snapshot())
+            if results:
+                self.characters = len(results)
+                if isinstance(results, JsonlResults):
+                    self.results_file = results.path
+                else:
+                    output_dir, composite_json = DelphiRound.paths(self.config, self.config.rounds)
+                    self.results_file = output_dir / composite_json
+        self.config = None
+
+
+class DelphiService:
+    """Job queue and worker threads around a warm base configuration."""
+    def __init__(self, base: DelphiConfig, jobs_dir: Path, inputs_dir: Path, workers: int = 1,
+                 keep_jobs: int = 100):
+        self.base = base
+        self.jobs_dir = jobs_dir
+        self.inputs_dir = inputs_dir
+        self.keep_jobs = keep_jobs  # Finished jobs kept in memory; their files stay on disk
+        self.jobs: Dict[str, Job] = {}
+        self._queue: 'queue.Queue[Optional[Job]]' = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers = [
+            threading.Thread(target=self._work, name=f"delphi-job-{i}", daemon=True)
+            for i in range(workers)
+        ]
+
+    def start(self) -> 'DelphiService':
+        # Index profiles and read them into the shared cache before the first job
+        delphi.load_prompt_assets(self.base)
+        for worker in self._workers:
+            worker.start()
+        return self
+
+    def stop(self) -> None:
+        """Cancel queued jobs, let running ones finish, then release the warm state."""
+        with self._lock:
+            for job in self.jobs.values():
+                if job.status == "queued":
+                    job.status = "cancelled"
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+        self.base.debug_writer.close()
+        self.base.client.close()
+        if self.base.store is not None:
+            self.base.store.close()
+
+    def job_config(self, job_id: str, params: JsonDict) -> DelphiConfig:
+        """A config for one job, sharing the base config's warm state; raises ValueError on bad params."""
+        unknown = sorted(set(params) - set(JOB_FIELDS))
+        if unknown:
+            raise ValueError(f"Unknown job settings: {', '.join(unknown)}")
+        changes = {}
+        for name, value in params.items():
+            try:
+                changes[name] = JOB_FIELDS[name](value)
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"Invalid job setting {name}: {str(e)}")
+        for name in ("panel", "questionnaire"):
+            if name in changes:
+                changes[name] = self.input_path(name, changes[name])
+        job_dir = self.jobs_dir / job_id
+        return dataclasses.replace(
+            self.base, shared=self.base, run_id=job_id, resume=False,
+            output_dir=job_dir / "delphi_round1", **changes
+        )
+
+    def input_path(self, name: str, value: str) -> Path:
+        """Resolve a job's file under the inputs directory; raises ValueError for anything outside it."""
+        base = self.inputs_dir.resolve()
+        path = (base / value).resolve()
+        if base not in path.parents:
+            raise ValueError(f"Invalid job setting {name}: must be a file under {self.inputs_dir}")
+        return path
+
+    def submit(self, params: JsonDict) -> Job:
+        """Validate and queue a job."""
+        job_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        job = Job(job_id, params)
+        job.config = self.job_config(job_id, params)
+        job.output_dir = job.config.output_dir.parent
+        with self._lock:
+            self.jobs[job_id] = job
+        self._queue.put(job)
+        logger.info("Job %s queued (%s waiting)", job_id, self._queue.qsize())
+        return job
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job that has not started yet."""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.status != "queued":
+                return False
+            job.status = "cancelled"
+            job.finished = time.time()
+            job.release()
+            self._prune()
+        logger.info("Job %s cancelled", job_id)
+        return True
+
+    def _prune(self) -> None:
+        """Forget the oldest finished jobs beyond keep_jobs; call with the lock held."""
+        finished = [job for job in self.jobs.values() if job.finished is not None]
+        finished.sort(key=lambda job: job.finished)
+        for job in finished[:max(0, len(finished) - self.keep_jobs)]:
+            del self.jobs[job.id]
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            with self._lock:
+                if job.status != "queued":
+                    continue
+                job.status = "running"
+                job.started = time.time()
+            self._run(job)
+
+    def _run(self, job: Job) -> None:
+        logger.info("Job %s started after %.3f s in the queue", job.id, job.started - job.submitted)
+        results: Optional[Mapping] = None
+        try:
+            # Report missing profiles or files in the job status, not just in the log
+            error = delphi.prompt_assets_error(job.config)
+            if error:
+                raise ValueError(error)
+            results = delphi.run_delphi_rounds(job.config)
+            job.status = "done" if results else "failed"
+            if not results:
+                job.error = "No successful responses were generated"
+        except Exception as e:
+            logger.error("Job %s failed: %s", job.id, e)
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.config.debug_writer.close()
+            with self._lock:
+                job.finished = time.time()
+                job.release(results)
+                self._prune()
+        logger.info("Job %s %s in %.1f s", job.id, job.status, job.finished - job.started)
+
+    def status(self) -> JsonDict:
+        with self._lock:
+            statuses = [job.status for job in self.jobs.values()]
+        return {"workers": len(self._workers), "queued": statuses.count("queued"),
+                "running": statuses.count("running"), "jobs": len(statuses)}
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: 'ServiceServer'
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _send(self, status: int, data: bytes, content_type: str = "application/json") -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, status: int, body: Any) -> None:
+        self._send(status, json.dumps(body, indent=2).encode("utf-8"))
+
+    def _job(self, parts: List[str]) -> Optional[Job]:
+        job = self.server.service.jobs.get(parts[1]) if len(parts) > 1 else None
+        if job is None:
+            self._send_json(404, {"error": "no such job"})
+        return job
+
+    def do_GET(self) -> None:
+        service = self.server.service
+        parts = self.path.strip("/").split("/")
+        if parts == ["health"]:
+            self._send_json(200, service.status())
+        elif parts == ["jobs"]:
+            self._send_json(200, [job.to_json() for job in list(service.jobs.values())])
+        elif parts[0] == "jobs" and len(parts) == 2:
+            job = self._job(parts)
+            if job:
+                self._send_json(200, job.to_json())
+        elif parts[0] == "jobs" and parts[2:] == ["results"]:
+            job = self._job(parts)
+            if job is None:
+                return
+            if job.status != "done":
+                self._send_json(409, {"error": f"job is {job.status}"})
+            elif job.results_file is None or not job.results_file.exists():
+                self._send_json(410, {"error": "results file is no longer available"})
+            elif job.results_file.suffix == ".jsonl":
+                self._send(200, job.results_file.read_bytes(), "application/x-ndjson")
+            else:
+                self._send(200, job.results_file.read_bytes())
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self) -> None:
+        if self.path.rstrip("/") != "/jobs":
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            params = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if not isinstance(params, dict):
+                raise ValueError("Job settings must be a JSON object")
+            job = self.server.service.submit(params)
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        self._send_json(202, job.to_json())
+
+    def do_DELETE(self) -> None:
+        parts = self.path.strip("/").split("/")
+        if parts[0] != "jobs" or len(parts) != 2:
+            self._send_json(404, {"error": "not found"})
+        else:
+            job = self._job(parts)
+            if job is None:
+                return
+            if self.server.service.cancel(job.id):
+                self._send_json(200, job.to_json())
+            else:
+                self._send_json(409, {"error": "only queued jobs can be cancelled"})
+
+
+class ServiceServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple, service: DelphiService):
+        super().__init__(address, ServiceHandler)
+        self.service = service
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run Delphi jobs submitted over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=1, help="Jobs run at the same time")
+    parser.add_argument("--jobs-dir", type=Path, default=Path("service/jobs"),
+                        help="Where each job's round directories are written")
+    parser.add_argument("--inputs-dir", type=Path, default=Path("service/inputs"),
+                        help="Directory that job panel and questionnaire paths are resolved in")
+    parser.add_argument("--keep-jobs", type=int, default=100,
+                        help="Finished jobs whose status is kept in memory")
+    args = parser.parse_args()
+
+    base = DelphiConfig(run_id="service", log_file=Path("logs/delphi_service.log"),
+                        event_log=Path("logs/delphi_service_events.jsonl"),
+                        concurrent_runs=args.workers)
+    delphi.logger = delphi.setup_logging(base)
+    service = DelphiService(base, args.jobs_dir, args.inputs_dir, args.workers, args.keep_jobs).start()
+    server = ServiceServer((args.host, args.port), service)
+    logger.info("Delphi service listening on %s:%s with %s worker(s)",
+                args.host, server.server_address[1], args.workers)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Shutting down; waiting for running jobs")
+    finally:
+        server.server_close()
+        service.stop()
+        delphi.stop_logging()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+SQLite store of Delphi results for queries across runs.
+
+Every round of every run is appended as a row in `runs`, together with the
+model settings it used, plus one row per character and question in
+`responses`. Writes are buffered and committed in batched transactions.
+Indexes on (character, question, run) and (question, run) turn questions
+such as "how did Yoda's rating on Q2 move across the last 500 runs" into
+index lookups.
+"""
+import argparse
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Shares the simulation's logger so store errors land in the run log
+logger = logging.getLogger('delphi')
+
+JsonDict = Dict[str, Any]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    round INTEGER NOT NULL,
+    started REAL NOT NULL,
+    model TEXT,
+    temperature REAL,
+    max_tokens INTEGER,
+    samples INTEGER,
+    prompt_layout TEXT,
+    UNIQUE (run_id, round)
+);
+CREATE TABLE IF NOT EXISTS responses (
+    run INTEGER NOT NULL REFERENCES runs (id),
+    character TEXT NOT NULL,
+    question INTEGER NOT NULL,
+    rating INTEGER NOT NULL,
+    confidence INTEGER NOT NULL,
+    position_summary TEXT,
+    detailed_explanation TEXT,
+    rating_spread INTEGER,
+    PRIMARY KEY (run, character, question)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS responses_by_character ON responses (character, question, run);
+CREATE INDEX IF NOT EXISTS responses_by_question ON responses (question, run);
+"""
+
+RUN_METADATA = ("model", "temperature", "max_tokens", "samples", "prompt_layout")
+
+
+class ResultsStore:
+    """Append-only SQLite results database with batched writes.
+
+    The database is opened on first use, so creating a store costs nothing
+    for runs that never write to it. Safe to share between threads.
+    """
+    def __init__(self, path: Path, batch_size: int = 500):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pending: List[Tuple[Any, ...]] = []
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def start_run(self, run_id: str, round_number: int, **metadata: Any) -> Optional[int]:
+        """Register a round of a run and return its key, or None if the database is unusable.
+
+        Run ids are unique per run, so an existing row means the run was
+        resumed and its answers are added to (or replace) what it recorded.
+        """
+        values = [metadata.get(name) for name in RUN_METADATA]
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    conn.execute(
+                        f"INSERT OR IGNORE INTO runs (run_id, round, started, {', '.join(RUN_METADATA)}) "
+                        f"VALUES (?, ?, ?, {', '.join('?' * len(RUN_METADATA))})",
+                        [run_id, round_number, time.time(), *values]
+                    )
+                row = conn.execute("SELECT id FROM runs WHERE run_id = ? AND round = ?",
+                                   (run_id, round_number)).fetchone()
+                return row["id"]
+        except sqlite3.Error as e:
+            logger.error("Error opening results store %s: %s", self.path, e)
+            return None
+
+    def add(self, run: Optional[int], character: str, result: JsonDict) -> None:
+        """Queue a character's answers; they are written once a batch has filled up."""
+        if run is None:
+            return
+        rows = [
+            (run, character, r["question"], r["rating"], r["confidence"],
+             r.get("position_summary"), r.get("detailed_explanation"), r.get("rating_spread"))
+            for r in result.get("responses", [])
+        ]
+        with self._lock:
+            self._pending.extend(rows)
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._pending:
+            return
+        try:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)", self._pending
+                )
+        except sqlite3.Error as e:
+            logger.error("Error writing %s rows to results store: %s", len(self._pending), e)
+        self._pending.clear()
+
+    def flush(self) -> None:
+        """Write any queued answers in one transaction."""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self) -> None:
+        """Flush and close the database."""
+        with self._lock:
+            self._flush_locked()
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def rating_history(self, character: str, question: int,
+                       last: Optional[int] = None) -> List[JsonDict]:
+        """A character's rating and confidence on a question, most recent run first."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT runs.run_id, runs.round, runs.started, runs.model, responses.rating, "
+                "responses.confidence FROM responses JOIN runs ON runs.id = responses.run "
+                "WHERE responses.character = ? AND responses.question = ? "
+                "ORDER BY responses.run DESC LIMIT ?",
+                (character, question, last if last is not None else -1)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def question_summary(self, question: int, last: Optional[int] = None) -> List[JsonDict]:
+        """Mean rating and confidence on a question per round of the most recent runs."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT runs.run_id, runs.round, COUNT(*) AS answers, AVG(responses.rating) AS mean_rating, "
+                "AVG(responses.confidence) AS mean_confidence FROM responses "
+                "JOIN runs ON runs.id = responses.run WHERE responses.question = ? "
+                "GROUP BY responses.run ORDER BY responses.run DESC LIMIT ?",
+                (question, last if last is not None else -1)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def runs(self, last: Optional[int] = None) -> List[JsonDict]:
+        """Recorded rounds with their settings and answer counts, most recent first."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT runs.*, (SELECT COUNT(DISTINCT character) FROM responses "
+                "WHERE responses.run = runs.id) AS characters FROM runs ORDER BY id DESC LIMIT ?",
+                (last if last is not None else -1,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Query the Delphi results store.")
+    parser.add_argument("--db", type=Path, default=Path("results/delphi.sqlite"))
+    parser.add_argument("--last", type=int, default=20, help="Most recent runs to show")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("runs", help="List recorded runs")
+    history = commands.add_parser("history", help="A character's ratings on a question across runs")
+    history.add_argument("character")
+    history.add_argument("question", type=int)
+    question = commands.add_parser("question", help="Panel mean rating on a question across runs")
+    question.add_argument("question", type=int)
+    args = parser.parse_args()
+
+    store = ResultsStore(args.db)
+    if args.command == "runs":
+        for run in store.runs(args.last):
+            print(f"{run['run_id']} round {run['round']}: {run['characters']} characters, "
+                  f"{run['model']} at temperature {run['temperature']}")
+    elif args.command == "history":
+        for row in store.rating_history(args.character, args.question, args.last):
+            print(f"{row['run_id']} round {row['round']}: rating {row['rating']}, "
+                  f"confidence {row['confidence']}")
+    else:
+        for row in store.question_summary(args.question, args.last):
+            print(f"{row['run_id']} round {row['round']}: mean rating {row['mean_rating']:.2f}, "
+                  f"mean confidence {row['mean_confidence']:.2f} ({row['answers']} answers)")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+Embedded vector index over panel explanations.
+
+Position summaries and detailed explanations from each round are split into
+chunks, embedded and appended to a directory of memory-mapped files:
+
+    header.json    dimension, chunk count, embedder name, character names, run ids
+    vectors.f32    unit-length float32 vectors, one row per chunk
+    labels.i32     question, character id, round and run id per chunk
+    texts.jsonl    chunk text and metadata
+    offsets.i64    byte offset of each chunk in texts.jsonl
+    ivf.npz        optional inverted-file (IVF) clustering for approximate search
+
+Search is exact brute force by default, a single matrix-vector product over
+the matching rows. After build_ivf() only the nearest clusters are scanned,
+together with anything appended since the clusters were built. Embedding is
+pluggable; HashingEmbedder needs no model server, so everything can be tested offline.
+
+Usage: python delphi_vectors.py INDEX_DIR "query text" [--question 2] [--k 5]
+       python delphi_vectors.py INDEX_DIR --build-ivf [--clusters 512]
+"""
+import argparse
+import json
+import re
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import requests
+
+JsonDict = Dict[str, Any]
+Embedder = Callable[[Sequence[str]], np.ndarray]
+
+QUESTION, CHARACTER, ROUND, RUN = range(4)  # Columns of labels.i32
+INITIAL_CAPACITY = 1024
+SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+')
+TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+
+class HashingEmbedder:
+    """Deterministic bag-of-words embedding by feature hashing of words and word pairs.
+
+    Needs no model, so indexes can be built and tested offline; similarity
+    is lexical rather than semantic.
+    """
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def __call__(self, texts: Sequence[str]) -> np.ndarray:
+        rows, columns, signs = [], [], []
+        for row, text in enumerate(texts):
+            tokens = TOKEN_RE.findall(text.lower())
+            for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+                h = zlib.crc32(feature.encode("utf-8"))
+                rows.append(row)
+                columns.append(h % self.dim)
+                signs.append(1.0 if h & 0x80000000 else -1.0)
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        np.add.at(vectors, (rows, columns), signs)
+        return normalize(vectors)
+
+
+class ApiEmbedder:
+    """Embeddings from an OpenAI-compatible /embeddings endpoint (llama.cpp supports one)."""
+    def __init__(self, base_url: str, model: str, timeout: float = 120.0):
+        self.url = f"{base_url}/embeddings"
+        self.model = model
+        self.name = f"api-{model}"
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def __call__(self, texts: Sequence[str]) -> np.ndarray:
+        response = self.session.post(self.url, json={"model": self.model, "input": list(texts)},
+                                     timeout=self.timeout)
+        response.raise_for_status()
+        data = sorted(response.json()["data"], key=lambda d: d["index"])
+        return normalize(np.array([d["embedding"] for d in data], dtype=np.float32))
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length so dot products are cosine similarities."""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+def chunk_text(text: str, max_chars: int = 500) -> List[str]:
+    """Split text at sentence boundaries into chunks of at most about max_chars."""
+    chunks: List[str] = []
+    current = ""
+    for sentence in SENTENCE_END_RE.split(text.strip()):
+        if current and len(current) + len(sentence) + 1 > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def iter_chunks(character: str, result: JsonDict, round_number: int,
+                run_id: str = "", max_chars: int = 500) -> Iterator[JsonDict]:
+    """Chunks (with metadata) of one character's answers: each summary, then its explanation."""
+    for response in result.get("responses", []):
+        base = {"character": character, "question": response.get("question", 0),
+                "round": round_number, "run_id": run_id}
+        if response.get("position_summary"):
+            yield {**base, "field": "position_summary", "text": response["position_summary"]}
+        for text in chunk_text(response.get("detailed_explanation") or "", max_chars):
+            yield {**base, "field": "detailed_explanation", "text": text}
+
+
+class VectorIndex:
+    """Append-only vector index persisted as memory-mapped files in a directory.
+
+    Files are opened on first use. Appends and searches are thread-safe.
+    Character names and run ids are stored as small integer ids in the labels.
+    """
+    def __init__(self, directory: Path, embedder: Embedder):
+        self.directory = Path(directory)
+        self.embedder = embedder
+        self.dim = 0
+        self.count = 0
+        self.characters: List[str] = []
+        self._character_ids: Dict[str, int] = {}
+        self.runs: List[str] = []
+        self._run_ids: Dict[str, int] = {}
+        self._vectors: Optional[np.memmap] = None
+        self._labels: Optional[np.memmap] = None
+        self._offsets: Optional[np.memmap] = None
+        self._ivf: Optional[Dict[str, np.ndarray]] = None
+        self._opened = False
+        self._lock = threading.Lock()
+
+    # Storage
+
+    def _open(self) -> None:
+        if self._opened:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        header_path = self.directory / "header.json"
+        if header_path.exists():
+            header = json.loads(header_path.read_text(encoding="utf-8"))
+            name = getattr(self.embedder, "name", None)
+            if name and header.get("embedder") not in (None, name):
+                raise ValueError(f"Index {self.directory} was built with {header['embedder']}, not {name}")
+            self.dim = header["dim"]
+            self.count = header["count"]
+            self.characters = header["characters"]
+            self._character_ids = {c: i for i, c in enumerate(self.characters)}
+            self.runs = header["runs"]
+            self._run_ids = {r: i for i, r in enumerate(self.runs)}
+            self._map(self._capacity())
+            ivf_path = self.directory / "ivf.npz"
+            if ivf_path.exists():
+                with np.load(ivf_path) as ivf:
+                    self._ivf = {name: ivf[name] for name in ivf.files}
+        self._opened = True
+
+    @staticmethod
+    def _intern(names: List[str], ids: Dict[str, int], name: str) -> int:
+        """The id of a character name or run id, assigning the next one if it is new."""
+        if name not in ids:
+            ids[name] = len(names)
+            names.append(name)
+        return ids[name]
+
+    def _capacity(self) -> int:
+        path = self.directory / "offsets.i64"
+        return path.stat().st_size // 8 if path.exists() else 0
+
+    def _map(self, capacity: int) -> None:
+        """(Re)map the column files, growing them to hold capacity rows."""
+        specs = [("vectors.f32", np.float32, (self.dim,)), ("labels.i32", np.int32, (4,)),
+                 ("offsets.i64", np.int64, ())]
+        mapped = []
+        for name, dtype, row_shape in specs:
+            path = self.directory / name
+            row_bytes = np.dtype(dtype).itemsize * int(np.prod(row_shape, dtype=int))
+            with path.open("ab") as f:
+                if f.tell() < capacity * row_bytes:
+                    f.truncate(capacity * row_bytes)
+            mapped.append(np.memmap(path, dtype=dtype, mode="r+", shape=(capacity,) + row_shape))
+        self._vectors, self._labels, self._offsets = mapped
+
+    def _write_header(self) -> None:
+        header = {"dim": self.dim, "count": self.count, "characters": self.characters,
+                  "runs": self.runs, "embedder": getattr(self.embedder, "name", None)}
+        tmp_path = self.directory / "header.json.tmp"
+        tmp_path.write_text(json.dumps(header), encoding="utf-8")
+        tmp_path.replace(self.directory / "header.json")
+
+    # Insertion
+
+    def add(self, chunks: Sequence[JsonDict], batch_size: int = 1024) -> int:
+        """Embed and append chunks (as produced by iter_chunks); returns how many were added.
+        
+        Chunks of a (run, round, character, question) that is already indexed
+        are skipped, so indexing the same results again adds nothing. Pass all
+        chunks of a character's answer in one call.
+        """
+        with self._lock:
+            self._open()
+            indexed = self._indexed_keys(chunks)
+        chunks = [c for c in chunks if self._key(c) not in indexed]
+        added = 0
+        for start in range(0, len(chunks), batch_size):
+            batch = chunks[start:start + batch_size]
+            added += self.add_vectors(self.embedder([c["text"] for c in batch]), batch)
+        return added
+
+    @staticmethod
+    def _key(chunk: JsonDict) -> Tuple[str, int, str, int]:
+        return (chunk.get("run_id", ""), chunk["round"], chunk["character"], chunk["question"])
+
+    def _indexed_keys(self, chunks: Sequence[JsonDict]) -> Set[Tuple[str, int, str, int]]:
+        """Keys (as in _key) already in the index for the runs of the given chunks."""
+        runs = {c.get("run_id", "") for c in chunks}
+        run_ids = [self._run_ids[r] for r in runs if r in self._run_ids]
+        if not run_ids or not self.count:
+            return set()
+        labels = self._labels[:self.count]
+        return {(self.runs[run], round_number, self.characters[character], question)
+                for question, character, round_number, run
+                in labels[np.isin(labels[:, RUN], run_ids)].tolist()}
+
+    def add_vectors(self, vectors: np.ndarray, chunks: Sequence[JsonDict]) -> int:
+        """Append pre-computed vectors with their chunk metadata."""
+        vectors = normalize(np.asarray(vectors, dtype=np.float32))
+        if not len(chunks):
+            return 0
+        with self._lock:
+            self._open()
+            if not self.dim:
+                self.dim = vectors.shape[1]
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Expected {self.dim}-dimensional vectors, got {vectors.shape[1]}")
+
+            needed = self.count + len(chunks)
+            if self._vectors is None or needed > len(self._vectors):
+                capacity = max(INITIAL_CAPACITY, len(self._vectors) if self._vectors is not None else 0)
+                while capacity < needed:
+                    capacity *= 2
+                self._map(capacity)
+
+            labels = np.empty((len(chunks), 4), dtype=np.int32)
+            offsets = np.empty(len(chunks), dtype=np.int64)
+            with (self.directory / "texts.jsonl").open("ab") as f:
+                for i, chunk in enumerate(chunks):
+                    labels[i] = (chunk["question"],
+                                 self._intern(self.characters, self._character_ids, chunk["character"]),
+                                 chunk["round"],
+                                 self._intern(self.runs, self._run_ids, chunk.get("run_id", "")))
+                    offsets[i] = f.tell()
+                    f.write(json.dumps(chunk).encode("utf-8") + b"\n")
+
+            rows = slice(self.count, needed)
+            self._vectors[rows] = vectors
+            self._labels[rows] = labels
+            self._offsets[rows] = offsets
+            for mapped in (self._vectors, self._labels, self._offsets):
+                mapped.flush()
+            self.count = needed
+            self._write_header()
+        return len(chunks)
+
+    # Approximate search structure
+
+    def build_ivf(self, clusters: Optional[int] = None, iterations: int = 10,
+                  sample_size: int = 50000, seed: int = 0) -> None:
+        """Cluster the current vectors (spherical k-means) into an inverted file.
+
+        Chunks appended later are searched exactly until the next rebuild.
+        """
+        with self._lock:
+            self._open()
+            count = self.count
+            vectors = self._vectors[:count]
+        if count == 0:
+            return
+        clusters = clusters or max(1, int(np.sqrt(count)))
+        rng = np.random.default_rng(seed)
+        sample = vectors[rng.choice(count, size=min(sample_size, count), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=min(clusters, len(sample)), replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            # Keep the old centroid for clusters that lost all their members
+            empty = ~np.bincount(assignment, minlength=len(centroids)).astype(bool)
+            sums[empty] = centroids[empty]
+            centroids = normalize(sums)
+
+        assignment = np.concatenate([
+            np.argmax(vectors[start:start + 65536] @ centroids.T, axis=1)
+            for start in range(0, count, 65536)
+        ])
+        order = np.argsort(assignment, kind="stable")
+        bounds = np.searchsorted(assignment[order], np.arange(len(centroids) + 1))
+        ivf = {"centroids": centroids, "order": order.astype(np.int64),
+               "bounds": bounds.astype(np.int64), "covered": np.array(count)}
+        np.savez(self.directory / "ivf.npz", **ivf)
+        with self._lock:
+            self._ivf = ivf
+
+    # Search
+
+    def _candidates(self, query: np.ndarray, count: int, nprobe: int) -> Optional[np.ndarray]:
+        """Row ids in the nprobe clusters nearest the query plus the uncovered tail, or None for all."""
+        ivf = self._ivf
+        if ivf is None or nprobe <= 0 or nprobe >= len(ivf["centroids"]):
+            return None
+        nearest = np.argpartition(-(ivf["centroids"] @ query), nprobe - 1)[:nprobe]
+        parts = [ivf["order"][ivf["bounds"][c]:ivf["bounds"][c + 1]] for c in nearest]
+        covered = int(ivf["covered"])
+        parts.append(np.arange(covered, count, dtype=np.int64))
+        return np.concatenate(parts)
+
+    def search(self, query: Any, k: int = 10, question: Optional[int] = None,
+               character: Optional[str] = None, exclude_character: Optional[str] = None,
+               round_number: Optional[int] = None, run_id: Optional[str] = None,
+               nprobe: int = 8) -> List[JsonDict]:
+        """The k chunks most similar to a query text or vector, optionally filtered.
+
+        Each result is the chunk's metadata plus its cosine "score". With an
+        IVF built, only the nprobe nearest clusters are scanned.
+        """
+        # float32 throughout: a float64 query would upcast every row it is multiplied with
+        vector = normalize(self.embedder([query])[0] if isinstance(query, str)
+                           else np.asarray(query)).astype(np.float32)
+        with self._lock:
+            self._open()
+            count = self.count
+            if count == 0 or k <= 0:
+                return []
+            vectors, labels, offsets = self._vectors, self._labels, self._offsets
+            character_ids, run_ids = self._character_ids, self._run_ids
+            if run_id is not None and run_id not in run_ids:
+                return []
+            ids = self._candidates(vector, count, nprobe)
+
+        # Filter on the label columns before touching the vectors
+        rows = labels[:count] if ids is None else labels[ids]
+        mask = np.ones(len(rows), dtype=bool)
+        for column, value in ((QUESTION, question), (ROUND, round_number)):
+            if value is not None:
+                mask &= rows[:, column] == value
+        if character is not None:
+            mask &= rows[:, CHARACTER] == character_ids.get(character, -1)
+        if exclude_character is not None and exclude_character in character_ids:
+            mask &= rows[:, CHARACTER] != character_ids[exclude_character]
+        if run_id is not None:
+            mask &= rows[:, RUN] == run_ids[run_id]
+
+        if ids is None:
+            ids = np.flatnonzero(mask) if not mask.all() else None
+        else:
+            ids = ids[mask]
+        if ids is not None and not len(ids):
+            return []
+        scores = (vectors[:count] if ids is None else vectors[ids]) @ vector
+        top = np.argpartition(-scores, min(k, len(scores)) - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        results = []
+        with (self.directory / "texts.jsonl").open("rb") as f:
+            for i in top:
+                row = int(i) if ids is None else int(ids[i])
+                f.seek(int(offsets[row]))
+                results.append({**json.loads(f.readline()), "score": float(scores[i])})
+        return results
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._open()
+            return self.count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Search a Delphi vector index.")
+    parser.add_argument("index", type=Path, help="Index directory")
+    parser.add_argument("query", nargs="?", help="Text to search for")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--question", type=int, default=None)
+    parser.add_argument("--character", default=None)
+    parser.add_argument("--run-id", default=None, help="Only search chunks from this run")
+    parser.add_argument("--dim", type=int, default=256, help="Dimension of the hashing embedder")
+    parser.add_argument("--build-ivf", action="store_true",
+                        help="Cluster the index for approximate search before any query")
+    parser.add_argument("--clusters", type=int, default=None,
+                        help="IVF clusters to build (default: square root of the chunk count)")
+    parser.add_argument("--nprobe", type=int, default=8, help="IVF clusters scanned per query")
+    args = parser.parse_args()
+    if args.query is None and not args.build_ivf:
+        parser.error("a query is required unless --build-ivf is given")
+
+    index = VectorIndex(args.index, HashingEmbedder(args.dim))
+    if args.build_ivf:
+        index.build_ivf(args.clusters)
+        print(f"Clustered {len(index)} chunks in {args.index}")
+    if args.query is None:
+        return
+    for hit in index.search(args.query, args.k, question=args.question, character=args.character,
+                            run_id=args.run_id, nprobe=args.nprobe):
+        print(f"{hit['score']:.3f}  Q{hit['question']} round {hit['round']} {hit['character']}: {hit['text']}")
+
+
+if __name__ == "__main__":
+    main()